@@ -8,6 +8,8 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=30, blank=True)
     last_name = models.CharField(max_length=30, blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # Уменьшенные копии аватара (см. apps.main.images.generate_variants)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(max_length=500, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from apps.main.images import srcset
 from .models import User
 
 
@@ -68,16 +69,21 @@ class UserProfileSerializer(serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()
     posts_count = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
+    avatar_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'id', 'username', 'email', 'first_name', 'last_name',
-            'full_name', 'avatar', 'bio', 'created_at', 'updated_at',
+            'full_name', 'avatar', 'avatar_srcset', 'bio', 'created_at', 'updated_at',
             'posts_count', 'comments_count'
         )
         read_only_fields = ('id', 'created_at', 'updated_at')
 
+    def get_avatar_srcset(self, obj):
+        """Уменьшенные копии аватара"""
+        return srcset(obj.avatar, obj.avatar_variants, self.context.get('request'))
+
     def get_posts_count(self, obj):
         """Безопасное получение количества постов"""
         try:
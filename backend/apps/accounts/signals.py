@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from apps.main.images import schedule_processing
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def user_pre_save(sender, instance, **kwargs):
+    '''Запоминает прежний аватар'''
+    if not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).values('avatar').first()
+        if previous:
+            instance._previous_avatar = previous['avatar'] or ''
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_avatar_changed(sender, instance, created, **kwargs):
+    '''Новый аватар - фоновая генерация производных'''
+    avatar = instance.avatar.name or ''
+    previous = '' if created else getattr(instance, '_previous_avatar', avatar)
+
+    if avatar != previous:
+        schedule_processing('user_avatar', instance.pk)
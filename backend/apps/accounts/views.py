@@ -1,4 +1,6 @@
 from django.contrib.auth import login
+from django.db import transaction
+from django.utils.decorators import method_decorator
 
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
@@ -60,6 +62,7 @@ class LoginView(generics.GenericAPIView):
         }, status=status.HTTP_200_OK)
 
 
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class ProfileView(generics.RetrieveAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
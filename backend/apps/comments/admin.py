@@ -11,7 +11,7 @@ class CommentAdmin(admin.ModelAdmin):
     ]
     list_filter = ['is_active', 'created_at', 'updated_at']
     search_fields = ['content', 'author__username', 'post__title']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['replies_count', 'created_at', 'updated_at']
     raw_id_fields = ['author', 'post', 'parent']
     list_editable = ['is_active']
 
@@ -20,7 +20,7 @@ class CommentAdmin(admin.ModelAdmin):
             'fields': ('post', 'author', 'parent', 'content')
         }),
         ('Status', {
-            'fields': ('is_active',)
+            'fields': ('is_active', 'replies_count')
         }),
         ('Timestamp',{
             'fields': ('created_at', 'updated_at'),
@@ -53,13 +53,13 @@ class CommentAdmin(admin.ModelAdmin):
 
 
     def make_active(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        updated = queryset.set_active(True)
         self.message_user(request, f'{updated} комменты активированы.')
     make_active.short_description = 'Comments were acrivate'
 
     
     def make_inactive(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        updated = queryset.set_active(False)
         self.message_user(request, f'{updated} комменты отключены')
     make_inactive.short_description = 'Comments were inactivate'
 
@@ -0,0 +1,72 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.main.models import Post
+from .models import Comment
+
+
+def _apply_deltas(model, field, deltas):
+    '''Один UPDATE на каждое различное приращение счётчика'''
+    ids_by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if pk is not None and delta:
+            ids_by_delta[delta].append(pk)
+
+    for delta, ids in ids_by_delta.items():
+        model.objects.filter(pk__in=ids).update(
+            **{field: Greatest(F(field) + delta, 0)}
+        )
+
+
+def shift_comment_counters(comments, sign):
+    '''
+    Сдвигает счётчики для набора комментариев.
+    comments - пары (post_id, parent_id), sign - +1 или -1.
+    '''
+    post_deltas = Counter()
+    parent_deltas = Counter()
+    for post_id, parent_id in comments:
+        post_deltas[post_id] += sign
+        parent_deltas[parent_id] += sign
+
+    _apply_deltas(Post, 'comments_count', post_deltas)
+    _apply_deltas(Comment, 'replies_count', parent_deltas)
+
+
+def rebuild_comment_counters(batch_size=10000):
+    '''
+    Пересчёт счётчиков комментариев пачками по диапазонам id.
+    Возврат кол-ва обработанных постов и комментариев.
+    '''
+    active_comments = Comment.objects.filter(
+        post=OuterRef('pk'), is_active=True
+    ).order_by().values('post').annotate(total=Count('pk')).values('total')
+
+    active_replies = Comment.objects.filter(
+        parent=OuterRef('pk'), is_active=True
+    ).order_by().values('parent').annotate(total=Count('pk')).values('total')
+
+    return {
+        'posts': _rebuild_in_batches(Post, 'comments_count', active_comments, batch_size),
+        'comments': _rebuild_in_batches(Comment, 'replies_count', active_replies, batch_size),
+    }
+
+
+def _rebuild_in_batches(model, field, subquery, batch_size):
+    updated = 0
+    last_id = 0
+
+    while True:
+        ids = list(
+            model.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return updated
+
+        updated += model.objects.filter(pk__gte=ids[0], pk__lte=ids[-1]).update(
+            **{field: Coalesce(Subquery(subquery), 0)}
+        )
+        last_id = ids[-1]
@@ -0,0 +1,22 @@
+from django.core.management import BaseCommand
+
+from apps.comments.counters import rebuild_comment_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild denormalized comments_count and replies_count counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of rows updated per UPDATE statement'
+        )
+
+    def handle(self, *args, **options):
+        result = rebuild_comment_counters(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны: постов {result["posts"]}, комментариев {result["comments"]}'
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['is_active', '-created_at'], name='comments_is_acti_6539ae_idx'),
+        ),
+    ]
@@ -1,7 +1,38 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
 
+class CommentQuerySet(models.QuerySet):
+    '''QuerySet комментариев с поддержкой счётчиков'''
+
+    def set_active(self, is_active):
+        '''
+        Массовое включение/отключение комментариев.
+        Счётчики постов и родительских комментариев сдвигаются
+        в той же транзакции.
+        '''
+        from apps.main.response_cache import invalidate_tags, POSTS_TAG
+        from .counters import shift_comment_counters
+
+        with transaction.atomic():
+            changed = list(
+                self.filter(is_active=not is_active)
+                .select_related(None)
+                .select_for_update()
+                .values_list('pk', 'post_id', 'parent_id')
+            )
+            if not changed:
+                return 0
+
+            Comment.objects.filter(pk__in=[pk for pk, _, _ in changed]).update(is_active=is_active)
+            shift_comment_counters(
+                [(post_id, parent_id) for _, post_id, parent_id in changed],
+                1 if is_active else -1,
+            )
+            invalidate_tags(POSTS_TAG)
+        return len(changed)
+
+
 # Create your models here.
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -23,10 +54,13 @@ class Comment(models.Model):
 
     content = models.TextField()
     is_active = models.BooleanField(default=True)
+    replies_count = models.PositiveIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         db_table = 'comments'
         verbose_name = 'Comment'
@@ -37,11 +71,8 @@ class Comment(models.Model):
             models.Index(fields=['post', '-created_at']),
             models.Index(fields=['author', '-created_at']),
             models.Index(fields=['parent', '-created_at']),
+            models.Index(fields=['is_active', '-created_at']),
         ]
     
     def __str__(self):
-        return f'Comment by {self.author.username} on {self.post.title}'
-    
-    @property
-    def replies_count(self):
-        return self.replies.filter(is_active=True).count()
\ No newline at end of file
+        return f'Comment by {self.author.username} on {self.post.title}'
\ No newline at end of file
@@ -1,9 +1,11 @@
 from rest_framework import serializers
 from .models import Comment
+from apps.main.fieldsets import SparseFieldsetMixin
+from apps.main.images import srcset
 from apps.main.models import Post
 
 
-class CommentSerializers(serializers.ModelSerializer):
+class CommentSerializers(SparseFieldsetMixin, serializers.ModelSerializer):
     '''Сериализатор для комментариев'''
 
     author_info = serializers.SerializerMethodField()
@@ -19,12 +21,21 @@ class CommentSerializers(serializers.ModelSerializer):
         ]
         read_only_fields = ['author', 'is_active']
 
+        sparse_columns = {
+            'author_info': ['author'],
+            'replies': ['parent'],
+        }
+        sparse_relations = {
+            'author_info': ['author'],
+        }
+
     def get_author_info(self, obj):
         return {
             'id': obj.author.id,
             'username': obj.author.username,
             'full_name': obj.author.full_name,
             'avatar': obj.author.avatar.url if obj.author.avatar else None,   
+            'avatar_srcset': srcset(obj.author.avatar, obj.author.avatar_variants),
         }
 
 
@@ -73,5 +84,5 @@ class CommentDetailSerializer(CommentSerializers):
     def get_replies(self, obj):
         if obj.parent is None:
             replies = obj.replies.filter(is_active=True).order_by('created_at')
-            return CommentSerializers(replies, many=True, context=self.context).data
+            return CommentSerializers(replies, many=True, context=self.nested_context()).data
         return []
\ No newline at end of file
@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
+from django.dispatch import receiver
+from apps.main.counters import PostDailyStatsBuffer
+from .models import Comment
+from .counters import shift_comment_counters
+
+
+@receiver(pre_save, sender=Comment)
+def comment_pre_save(sender, instance, **kwargs):
+    '''Запоминает прежний статус комментария для сдвига счётчиков'''
+    if not instance._state.adding:
+        instance._previous_is_active = (
+            Comment.objects.filter(pk=instance.pk)
+            .values_list('is_active', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def comment_post_save(sender, instance, created, **kwargs):
+    '''Обновляет счётчики поста и родительского комментария'''
+    if created:
+        if instance.is_active:
+            shift_comment_counters([(instance.post_id, instance.parent_id)], 1)
+            post_id = instance.post_id
+            transaction.on_commit(lambda: PostDailyStatsBuffer.record_comment(post_id))
+        return
+
+    previous = getattr(instance, '_previous_is_active', None)
+    if previous is not None and previous != instance.is_active:
+        shift_comment_counters(
+            [(instance.post_id, instance.parent_id)],
+            1 if instance.is_active else -1,
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_post_delete(sender, instance, **kwargs):
+    '''Жесткое удаление активного комментария уменьшает счётчики'''
+    if instance.is_active:
+        shift_comment_counters([(instance.post_id, instance.parent_id)], -1)
@@ -1,11 +1,12 @@
 from django.urls import path
 from . import views
+from apps.main.async_api import read_view
 
 
 urlpatterns = [
     path('', views.CommentListCreateView.as_view(), name='comment-list'),
     path('<int:pk>/', views.CommentDetailView.as_view(), name='comment-detail'),
     path('my-comments/', views.MyCommentsView.as_view(), name='my-comments'),
-    path('post/<int:post_id>/', views.post_comments, name='post_comments'),
+    path('post/<int:post_id>/', read_view(views.post_comments, views.post_comments_async), name='post_comments'),
     path('<int:comment_id>/replies/', views.comment_replies, name='comment-replies')
 ]
@@ -2,7 +2,9 @@ from rest_framework import generics, permissions, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.utils.decorators import method_decorator
 
 from .models import Comment
 from .serializers import (
@@ -11,18 +13,29 @@ from .serializers import (
     CommentUpdateSerializer,
     CommentDetailSerializer,
 )
+from .fast_serializers import CommentFastSerializer
 from .permissions import IsAuthorOrReadOnly
+from apps.main.async_api import async_api_view, serializer_data
+from apps.main.conditional import ConditionalListMixin, ConditionalRetrieveMixin
+from apps.main.fast_serializers import fast_path_enabled
+from apps.main.fieldsets import SparseFieldsetViewMixin
 from apps.main.models import Post
+from apps.main.pagination import OptInCursorPagination
 
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class CommentListCreateView(ConditionalListMixin, SparseFieldsetViewMixin, generics.ListCreateAPIView):
     '''Список и создание комментариев'''
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = OptInCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_firlds = ['post', 'author', 'parent']
     search_fields = ['content']
     ordering_fields = ['created_at', 'updated_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    validator_fields = ('updated_at', 'replies_count')
+    related_validator_fields = (
+        'author__username', 'author__first_name', 'author__last_name', 'author__avatar', 'author__avatar_variants',
+    )
 
     def get_queryset(self):
         return Comment.objects.filter(is_active=True).select_related(
@@ -35,11 +48,15 @@ class CommentListCreateView(generics.ListCreateAPIView):
         return CommentSerializers
 
 
-class CommentDetailView(generics.RetrieveUpdateAPIView):
+class CommentDetailView(ConditionalRetrieveMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     '''Просмотр, обновление и удаление комментариев'''
     queryset = Comment.objects.filter(is_active=True).select_related('author', 'post')
     serializer_class = CommentDetailSerializer
     permission_classes = [IsAuthorOrReadOnly]
+    validator_fields = ('updated_at', 'replies_count')
+    related_validator_fields = (
+        'author__username', 'author__first_name', 'author__last_name', 'author__avatar', 'author__avatar_variants',
+    )
 
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -47,20 +64,26 @@ class CommentDetailView(generics.RetrieveUpdateAPIView):
         return CommentDetailSerializer
 
     def perform_destroy(self, instance):
-        # Мягкое удаление - пометка как неактивный
+        # Мягкое удаление - пометка как неактивный, счётчики сдвигают сигналы
         instance.is_active = False
-        instance.save()
+        instance.save(update_fields=['is_active', 'updated_at'])
 
 
-class MyCommentsView(generics.ListAPIView):
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class MyCommentsView(ConditionalListMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     '''Список комментариев текущего пользователя'''
     serializer_class = CommentSerializers
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = OptInCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['post', 'parent', 'is_active']
     search_fields = ['content']
     ordering_fields = ['created_at', 'updated_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    validator_fields = ('updated_at', 'replies_count')
+    related_validator_fields = (
+        'author__username', 'author__first_name', 'author__last_name', 'author__avatar', 'author__avatar_variants',
+    )
 
     def get_queryset(self):
         return Comment.objects.filter(author=self.request.user).select_related(
@@ -68,31 +91,60 @@ class MyCommentsView(generics.ListAPIView):
         )
 
 
-@api_view(['GET'])
-@permission_classes([permissions.AllowAny])
-def post_comments(request, post_id):
-    '''Получить комментарий к определенному посту'''
-    post = get_object_or_404(Post, id=post_id, status='published')
-
-    # Получаем только основные комментарии
-    comments = Comment.objects.filter(
+def top_level_comments(post):
+    '''Основные комментарии поста (ответы вложены в них)'''
+    return Comment.objects.filter(
         post=post,
         parent=None,
         is_active=True,
     ).select_related('author').prefetch_related('replies__author').order_by('-created_at')
-    
-    serializer = CommentDetailSerializer(comments, many=True, context={'request': request})
-    return Response({
+
+
+def post_comments_data(post, comments):
+    return {
         'post': {
             'id': post.id,
             'title': post.title,
             'slug': post.slug,
         },
-        'comments': serializer.data,
+        'comments': comments,
         'comments_count': post.comments_count,
-    })
+    }
+
+
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def post_comments(request, post_id):
+    '''Получить комментарий к определенному посту'''
+    post = get_object_or_404(Post, id=post_id, status='published')
+    comments = top_level_comments(post)
+
+    if fast_path_enabled(request):
+        data = CommentFastSerializer(request).serialize(comments)
+    else:
+        data = CommentDetailSerializer(comments, many=True, context={'request': request}).data
+
+    return Response(post_comments_data(post, data))
+
+
+@async_api_view()
+async def post_comments_async(request, post_id):
+    '''post_comments на async ORM (запуск под ASGI)'''
+    post = await aget_object_or_404(
+        Post.objects.only('id', 'title', 'slug', 'comments_count'), id=post_id, status='published'
+    )
+    comments = top_level_comments(post)
+
+    if fast_path_enabled(request):
+        data = await CommentFastSerializer(request).aserialize(comments)
+    else:
+        data = await serializer_data(CommentDetailSerializer(comments, many=True, context={'request': request}))
+
+    return Response(post_comments_data(post, data))
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def comment_replies(request, comment_id):
@@ -105,7 +157,7 @@ def comment_replies(request, comment_id):
 
     serializer = CommentSerializers(replies, many=True, context={'request': request})
     return Response({
-        'parent_comment': CommentSerializers(parent_comment, context={'request': request}),
+        'parent_comment': CommentSerializers(parent_comment, context={'request': request}).data,
         'replies': serializer.data,
-        'replies_count': replies.count()
+        'replies_count': parent_comment.replies_count
     })
\ No newline at end of file
@@ -9,12 +9,7 @@ class CategoryAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('name', 'description')
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ('created_at',)
-
-
-    def posts_count(self, obj):
-        return obj.posts.count()
-    posts_count.short_description = 'Posts Count'
+    readonly_fields = ('posts_count', 'created_at',)
 
 
 @admin.register(Post)
@@ -26,7 +21,7 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('status', 'category', 'created_at', 'updated_at')
     search_fields = ('title', 'content', 'author__username')
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ('created_at', 'updated_at', 'views_count')
+    readonly_fields = ('created_at', 'updated_at', 'views_count', 'comments_count')
     raw_id_fields = ('author',)
 
     fieldsets = (
@@ -37,15 +32,10 @@ class PostAdmin(admin.ModelAdmin):
             'fields': ('category', 'author', 'status')
         }),
         ('Statitstics', {
-            'fields': ('views_count', 'created_at', 'updated_at'),
+            'fields': ('views_count', 'comments_count', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
 
-    def comments_count(self, obj):
-        return obj.comments.count()
-    comments_count.short_description = 'Comments'
-
-    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('author', 'category',)
\ No newline at end of file
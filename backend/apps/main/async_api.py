@@ -0,0 +1,97 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import exceptions, permissions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+def read_view(sync_view, async_view):
+    '''Вариант view для urls.py: async - при запуске под ASGI (ASYNC_READ_VIEWS_ENABLED)'''
+    return async_view if settings.ASYNC_READ_VIEWS_ENABLED else sync_view
+
+
+async def authenticate(request):
+    '''
+    То же, что JWTAuthentication: токен проверяется без БД,
+    юзер загружается тем же get_user() в потоке синхронного кода.
+    '''
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return AnonymousUser(), None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return AnonymousUser(), None
+
+    token = authentication.get_validated_token(raw_token)
+    return await sync_to_async(authentication.get_user)(token), token
+
+
+async def serializer_data(serializer):
+    '''Обычный DRF-сериализатор (?fields=/?omit=) - в потоке: его поля читают БД синхронно'''
+    return await sync_to_async(lambda: serializer.data)()
+
+
+def _handle_exception(exc, request, args, kwargs):
+    '''Ответ на исключение так же, как APIView.handle_exception'''
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        exc.auth_header = JWTAuthentication().authenticate_header(request)
+
+    response = api_settings.EXCEPTION_HANDLER(exc, {'request': request, 'args': args, 'kwargs': kwargs})
+    if response is None:
+        raise exc
+    return response
+
+
+def _render(response):
+    '''
+    DRF Response -> готовый HttpResponse: отложенный рендер Django
+    выполнил бы в потоке синхронного кода, под ASGI это лишний переход.
+    '''
+    content = JSONRenderer().render(response.data)
+    rendered = HttpResponse(content, status=response.status_code, content_type=JSONRenderer.media_type)
+    for header, value in response.items():
+        if header != 'Content-Type':
+            rendered[header] = value
+    return rendered
+
+
+def async_api_view(permission_classes=(permissions.AllowAny,)):
+    '''
+    Async-аналог @api_view(['GET']) и @permission_classes для read-эндпоинтов.
+    view получает DRF Request и возвращает Response; аутентификация - JWT,
+    ошибки - через EXCEPTION_HANDLER DRF, поэтому ответы совпадают с sync-вариантом.
+    Без транзакции на запрос: async-view с ATOMIC_REQUESTS Django не запускает.
+    '''
+    def decorator(view):
+        @transaction.non_atomic_requests
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            request = Request(request)
+            try:
+                if request.method != 'GET':
+                    raise exceptions.MethodNotAllowed(request.method)
+
+                request.user, request.auth = await authenticate(request)
+                for permission_class in permission_classes:
+                    permission = permission_class()
+                    if not permission.has_permission(request, None):
+                        if not request.user.is_authenticated:
+                            raise exceptions.NotAuthenticated()
+                        raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+                response = await view(request, *args, **kwargs)
+            except Exception as exc:
+                response = _handle_exception(exc, request, args, kwargs)
+
+            response['Allow'] = 'GET'
+            return _render(response)
+        return wrapper
+    return decorator
@@ -0,0 +1,54 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+
+from .models import Category, Post
+
+
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_LENGTH = 100
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+# Сколько совпадений по индексу ранжировать по похожести
+CANDIDATES_LIMIT = 200
+
+
+def normalize_prefix(value):
+    '''Нормализация ввода: регистр и пробелы не влияют ни на выдачу, ни на ключ кэша'''
+    return ' '.join(value.lower().split())[:MAX_PREFIX_LENGTH]
+
+
+def _suggest(queryset, field, prefix, limit):
+    '''
+    Совпадения по триграммному индексу (UPPER(field) LIKE), затем
+    ранжирование ограниченного набора кандидатов по похожести.
+    '''
+    candidates = queryset.filter(**{f'{field}__icontains': prefix}).order_by().values('pk')
+    return list(
+        queryset.filter(pk__in=candidates[:CANDIDATES_LIMIT])
+        .annotate(similarity=TrigramSimilarity(field, prefix))
+        .order_by('-similarity', field)
+        .values('id', field, 'slug')[:limit]
+    )
+
+
+def suggest(prefix, limit=DEFAULT_LIMIT):
+    '''Подсказки по заголовкам постов и названиям категорий с кэшем на префикс'''
+    prefix = normalize_prefix(prefix)
+    if len(prefix) < MIN_PREFIX_LENGTH:
+        return {'posts': [], 'categories': []}
+
+    digest = hashlib.md5(prefix.encode()).hexdigest()
+    cache_key = f'autocomplete:{limit}:{digest}'
+
+    result = cache.get(cache_key)
+    if result is None:
+        result = {
+            'posts': _suggest(Post.objects.filter(status='published'), 'title', prefix, limit),
+            'categories': _suggest(Category.objects.all(), 'name', prefix, limit),
+        }
+        cache.set(cache_key, result, settings.AUTOCOMPLETE_CACHE_TTL)
+    return result
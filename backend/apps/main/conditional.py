@@ -0,0 +1,196 @@
+import hashlib
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from rest_framework.response import Response
+
+from .response_cache import tag_versions
+
+
+def make_etag(values, weak=False):
+    '''ETag по значениям валидаторов'''
+    digest = hashlib.md5('|'.join(map(str, values)).encode()).hexdigest()
+    etag = quote_etag(digest)
+    return f'W/{etag}' if weak else etag
+
+
+def not_modified(request, etag):
+    '''
+    304 Not Modified, если валидаторы клиента совпадают с текущими, иначе None.
+    Проверяются только безопасные методы.
+    '''
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    response = get_conditional_response(request, etag=etag, response=set_validators(HttpResponse(), etag))
+    return response if response.status_code == 304 else None
+
+
+def set_validators(response, etag):
+    response['ETag'] = etag
+    return response
+
+
+def tag_validators(tags):
+    '''Версии тегов кэша ответов (реестр закреплений и т.п.) для ETag'''
+    if not tags:
+        return []
+    versions = tag_versions(tags)
+    return [versions[tag] for tag in tags]
+
+
+def related_value(obj, path):
+    '''
+    Значение поля через связи (author__username) по уже загруженным объектам.
+    Связь не загружена (?fields= её снял) - поле не выводится, None без запроса.
+    '''
+    *relations, name = path.split('__')
+    for relation in relations:
+        field = obj._meta.get_field(relation)
+        if not field.is_cached(obj):
+            return None
+        obj = field.get_cached_value(obj)
+        if obj is None:
+            return None
+    return getattr(obj, name)
+
+
+class ConditionalRetrieveMixin:
+    '''
+    Conditional GET для detail-эндпоинтов.
+    Валидаторы (updated_at и столбцы-счётчики из validator_fields, поля
+    связанных объектов из related_validator_fields) читаются лёгким запросом
+    .values(); при совпадении с If-None-Match объект не загружается и не
+    сериализуется. Всё, от чего ответ зависит помимо строк БД, добавляет
+    response_validators(): версии тегов кэша из validator_tags (реестры)
+    и т.п.; заголовки, по которым различаются ответы, - vary_headers.
+    ETag слабый: счётчики в ответе могут опережать БД (буфер просмотров).
+    Last-Modified не отдаётся: счётчики меняются без updated_at, и
+    If-Modified-Since давал бы 304 с устаревшими значениями.
+    '''
+
+    validator_fields = ('updated_at',)
+    related_validator_fields = ()
+    validator_tags = ()
+    vary_headers = ()
+
+    def response_validators(self):
+        '''Значения вне строк БД, от которых зависит ответ'''
+        return tag_validators(self.validator_tags)
+
+    def get_validators(self):
+        '''(etag, values) или None, если объекта нет'''
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        fields = ('pk', *self.validator_fields, *self.related_validator_fields)
+        values = (
+            self.filter_queryset(self.get_queryset())
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values(*fields)
+            .first()
+        )
+        if values is None:
+            return None
+
+        etag = make_etag([values[field] for field in fields] + self.response_validators(), weak=True)
+        return etag, values
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            # 404 - штатным путём
+            return super().retrieve(request, *args, **kwargs)
+
+        etag, values = validators
+        response = not_modified(request, etag)
+        if response is None:
+            response = self.retrieve_modified(request, values, *args, **kwargs)
+        else:
+            self.retrieve_not_modified(request, values)
+
+        patch_vary_headers(response, self.vary_headers)
+        return set_validators(response, etag)
+
+    def retrieve_modified(self, request, values, *args, **kwargs):
+        '''Полный ответ: объект изменился или у клиента нет копии'''
+        return super().retrieve(request, *args, **kwargs)
+
+    def retrieve_not_modified(self, request, values):
+        '''Побочные эффекты чтения, которые нужны и при 304'''
+
+
+class ConditionalListMixin:
+    '''
+    Слабый ETag для списков: состав страницы, её максимальный updated_at,
+    счётчики из validator_fields, поля связанных объектов из
+    related_validator_fields, версии тегов кэша из validator_tags и, при
+    постраничной пагинации, общее число объектов (count и ссылки ответа).
+    Совпадение с If-None-Match даёт 304 без сериализации страницы.
+    '''
+
+    validator_fields = ('updated_at',)
+    related_validator_fields = ()
+    validator_tags = ()
+
+    def page_validators(self, page):
+        '''Валидаторы объектов страницы: [{'pk': ..., поле: значение}]'''
+        return [
+            {
+                'pk': obj.pk,
+                **{field: getattr(obj, field) for field in self.validator_fields},
+                **{field: related_value(obj, field) for field in self.related_validator_fields},
+            }
+            for obj in page
+        ]
+
+    def response_validators(self):
+        '''Значения вне строк страницы, от которых зависит ответ'''
+        return tag_validators(self.validator_tags) + self.pagination_validators()
+
+    def pagination_validators(self):
+        '''Число объектов при постраничной пагинации: от него зависят count и next'''
+        paginator = getattr(self.paginator, 'paginator', self.paginator)
+        page = getattr(paginator, 'page', None)
+        if hasattr(page, 'paginator'):
+            return [page.paginator.count]
+        return []
+
+    def validators_etag(self, rows):
+        values = [row['pk'] for row in rows]
+        if rows:
+            values.append(max(row['updated_at'] for row in rows))
+        for field in self.validator_fields:
+            if field != 'updated_at':
+                values.extend(row[field] for row in rows)
+        for field in self.related_validator_fields:
+            # Страницы общей ленты в кэше могли быть собраны без этих полей
+            values.extend(row.get(field) for row in rows)
+        return make_etag(values + self.response_validators(), weak=True)
+
+    def page_etag(self, page):
+        return self.validators_etag(self.page_validators(page))
+
+    def conditional_page(self, page, build_response):
+        '''Ответ со слабым ETag; build_response() вызывается только при изменениях'''
+        return self.conditional_response(self.page_etag(page), build_response)
+
+    def conditional_response(self, etag, build_response):
+        response = not_modified(self.request, etag)
+        if response is None:
+            response = build_response()
+        return set_validators(response, etag)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+
+        if page is not None:
+            return self.conditional_page(
+                page,
+                lambda: self.get_paginated_response(self.get_serializer(page, many=True).data),
+            )
+
+        objects = list(queryset)
+        return self.conditional_page(
+            objects,
+            lambda: Response(self.get_serializer(objects, many=True).data),
+        )
@@ -0,0 +1,368 @@
+import hashlib
+import logging
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import AppliedCounterBatch, Category, Post, PostDailyStats
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+
+
+def get_redis():
+    '''Ленивое подключение к Redis для буферов счётчиков'''
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+class PostViewBuffer:
+    '''
+    Write-behind буфер просмотров постов.
+    Просмотры копятся в хеше Redis и периодически сбрасываются в БД
+    пакетными UPDATE ... SET views_count = views_count + n.
+    '''
+
+    PENDING_KEY = 'post_views:pending'
+    FLUSHING_PREFIX = 'post_views:flushing:'
+    LOCK_KEY = 'post_views:flush-lock'
+    LOCK_TIMEOUT = 300
+    HOURLY_PREFIX = 'post_views:hourly:'
+
+    @classmethod
+    def record(cls, post_id, viewer=None):
+        '''
+        Учитывает один просмотр (и в дневной статистике).
+        Возвращает кол-во просмотров, ещё не попавших в БД.
+        '''
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.hincrby(cls.PENDING_KEY, post_id, 1)
+            PostDailyStatsBuffer.add_view(pipe, post_id, viewer)
+            return pipe.execute()[0]
+        except redis.RedisError as e:
+            # Redis недоступен - пишем напрямую, чтобы не терять просмотры
+            logger.warning(f'View buffer unavailable, writing directly: {e}')
+            Post.objects.filter(pk=post_id).update(views_count=F('views_count') + 1)
+            return 1
+
+    @classmethod
+    def flush(cls):
+        '''
+        Сбрасывает накопленные просмотры в БД.
+        Буфер атомарно переименовывается перед обработкой, поэтому новые
+        просмотры продолжают копиться. Пакет, оставшийся после падения
+        воркера, обрабатывается при следующем сбросе; если до падения он
+        успел попасть в БД, отметка AppliedCounterBatch не даёт применить
+        его повторно.
+        Блокировка продлевается перед каждым пакетом: долгий сброс не
+        отдаёт её параллельному воркеру.
+        '''
+        client = get_redis()
+        lock = client.lock(cls.LOCK_KEY, timeout=cls.LOCK_TIMEOUT)
+
+        if not lock.acquire(blocking=False):
+            return 0
+
+        try:
+            batches = [key.decode() for key in client.scan_iter(match=f'{cls.FLUSHING_PREFIX}*')]
+            # Отметки пакетов, которых уже нет в Redis, больше не нужны
+            AppliedCounterBatch.objects.filter(
+                key__startswith=cls.FLUSHING_PREFIX
+            ).exclude(key__in=batches).delete()
+
+            batch_key = f'{cls.FLUSHING_PREFIX}{uuid.uuid4().hex}'
+            try:
+                client.rename(cls.PENDING_KEY, batch_key)
+                batches.append(batch_key)
+            except redis.ResponseError:
+                # Буфер пуст
+                pass
+
+            flushed = 0
+            for key in batches:
+                lock.extend(cls.LOCK_TIMEOUT, replace_ttl=True)
+                counts = client.hgetall(key)
+                applied = cls._apply(key, counts)
+                if applied is not None:
+                    flushed += applied
+                    cls._record_window(client, counts)
+                client.delete(key)
+            return flushed
+        finally:
+            lock.release()
+
+    @classmethod
+    def hourly_key(cls, moment):
+        return f'{cls.HOURLY_PREFIX}{moment:%Y%m%d%H}'
+
+    @staticmethod
+    def hourly_ttl():
+        '''Корзина нужна, пока её час попадает в окно рейтинга (+ текущий неполный час)'''
+        return (settings.HOT_RANKING_WINDOW_HOURS + 1) * 3600
+
+    @classmethod
+    def _record_window(cls, client, counts):
+        '''Почасовые корзины просмотров для расчёта "горячих" постов'''
+        if not counts:
+            return
+
+        key = cls.hourly_key(timezone.now())
+        pipe = client.pipeline()
+        for post_id, delta in counts.items():
+            pipe.hincrby(key, post_id, int(delta))
+        pipe.expire(key, cls.hourly_ttl())
+        pipe.execute()
+
+    @classmethod
+    def windowed_views(cls, hours):
+        '''Просмотры постов за последние hours часов по почасовым корзинам'''
+        client = get_redis()
+        now = timezone.now()
+        views = defaultdict(int)
+
+        for hour in range(hours):
+            bucket = client.hgetall(cls.hourly_key(now - timedelta(hours=hour)))
+            for post_id, delta in bucket.items():
+                views[int(post_id)] += int(delta)
+        return views
+
+    @staticmethod
+    def _apply(batch_key, counts):
+        '''
+        Один UPDATE на каждое различное приращение.
+        Возврат числа просмотров или None, если пакет уже был применён.
+        '''
+        posts_by_delta = defaultdict(list)
+        for post_id, delta in counts.items():
+            posts_by_delta[int(delta)].append(int(post_id))
+
+        with transaction.atomic():
+            _, created = AppliedCounterBatch.objects.get_or_create(key=batch_key)
+            if not created:
+                return None
+            for delta, post_ids in posts_by_delta.items():
+                Post.objects.filter(pk__in=post_ids).update(
+                    views_count=F('views_count') + delta
+                )
+        return sum(delta * len(ids) for delta, ids in posts_by_delta.items())
+
+
+def viewer_id(request):
+    '''Идентификатор зрителя: id юзера или хеш адреса и браузера анонима'''
+    if request.user.is_authenticated:
+        return f'u:{request.user.pk}'
+    fingerprint = f"{request.META.get('REMOTE_ADDR', '')}|{request.META.get('HTTP_USER_AGENT', '')}"
+    return f'a:{hashlib.md5(fingerprint.encode()).hexdigest()}'
+
+
+class PostDailyStatsBuffer:
+    '''
+    Дневная статистика постов в Redis: итоги дня по просмотрам и комментариям
+    в хешах, зрители - в скетчах HyperLogLog на (день, пост): до 12 КБ на
+    скетч при любом числе зрителей, ошибка оценки ~0.8%.
+    flush() переносит итоги и скетчи в PostDailyStats пачками INSERT ...
+    ON CONFLICT DO UPDATE и вливает дневные скетчи в скетч поста за всё время.
+    В таблицу пишутся итоги дня, а объединение скетчей идемпотентно, поэтому
+    повторный или прерванный перенос ничего не искажает.
+    '''
+
+    PREFIX = 'post_stats:'
+    TTL = 3 * 86400
+    TEMP_TTL = 60
+    # Сегодня и вчера: события до полуночи переносятся следующим сбросом
+    FLUSH_DAYS = 2
+    BATCH_SIZE = 1000
+
+    @classmethod
+    def _key(cls, metric, day):
+        return f'{cls.PREFIX}{metric}:{day:%Y%m%d}'
+
+    @classmethod
+    def viewers_key(cls, day, post_id):
+        return f'{cls.PREFIX}uniques:{day:%Y%m%d}:{post_id}'
+
+    @classmethod
+    def add_view(cls, pipe, post_id, viewer=None, day=None):
+        '''Команды учёта просмотра в конвейер Redis'''
+        day = day or timezone.localdate()
+        views_key = cls._key('views', day)
+        pipe.hincrby(views_key, post_id, 1)
+        pipe.expire(views_key, cls.TTL)
+        if viewer:
+            viewers_key = cls.viewers_key(day, post_id)
+            pipe.pfadd(viewers_key, viewer)
+            pipe.expire(viewers_key, cls.TTL)
+
+    @classmethod
+    def record_comment(cls, post_id):
+        day = timezone.localdate()
+        key = cls._key('comments', day)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.hincrby(key, post_id, 1)
+            pipe.expire(key, cls.TTL)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f'Daily stats buffer unavailable, comment not counted: {e}')
+
+    @classmethod
+    def flush(cls):
+        '''Перенос итогов за последние FLUSH_DAYS дней в PostDailyStats'''
+        client = get_redis()
+        today = timezone.localdate()
+        days = [today - timedelta(days=offset) for offset in range(cls.FLUSH_DAYS)]
+        flushed = 0
+        touched = set()
+
+        for day in days:
+            views = {int(k): int(v) for k, v in client.hgetall(cls._key('views', day)).items()}
+            comments = {int(k): int(v) for k, v in client.hgetall(cls._key('comments', day)).items()}
+
+            # Посты могли быть удалены после события
+            post_ids = sorted(
+                Post.objects.filter(pk__in=views.keys() | comments.keys()).order_by().values_list('pk', flat=True)
+            )
+            if not post_ids:
+                continue
+
+            pipe = client.pipeline(transaction=False)
+            for post_id in post_ids:
+                pipe.get(cls.viewers_key(day, post_id))
+                pipe.pfcount(cls.viewers_key(day, post_id))
+            results = pipe.execute()
+
+            rows = [
+                PostDailyStats(
+                    post_id=post_id,
+                    date=day,
+                    views=views.get(post_id, 0),
+                    unique_viewers=unique_viewers,
+                    comments=comments.get(post_id, 0),
+                    viewers_sketch=sketch or b'',
+                )
+                for post_id, sketch, unique_viewers in zip(post_ids, results[::2], results[1::2])
+            ]
+            PostDailyStats.objects.bulk_create(
+                rows,
+                batch_size=cls.BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['post', 'date'],
+                update_fields=['views', 'unique_viewers', 'comments', 'viewers_sketch'],
+            )
+            flushed += len(rows)
+            touched.update(row.post_id for row in rows if row.viewers_sketch)
+
+        cls._merge_lifetime(client, sorted(touched), days)
+        return flushed
+
+    @classmethod
+    def _merge_lifetime(cls, client, post_ids, days):
+        '''Вливает дневные скетчи в скетчи постов за всё время'''
+        for start in range(0, len(post_ids), cls.BATCH_SIZE):
+            batch = Post.objects.filter(
+                pk__in=post_ids[start:start + cls.BATCH_SIZE]
+            ).order_by().only('pk', 'viewers_sketch')
+            posts = list(batch)
+
+            prefix = f'{cls.PREFIX}tmp:{uuid.uuid4().hex}'
+            pipe = client.pipeline(transaction=False)
+            for post in posts:
+                key = f'{prefix}:{post.pk}'
+                if post.viewers_sketch:
+                    pipe.set(key, bytes(post.viewers_sketch), ex=cls.TEMP_TTL)
+                pipe.pfmerge(key, key, *[cls.viewers_key(day, post.pk) for day in days])
+                pipe.get(key)
+                pipe.pfcount(key)
+                pipe.delete(key)
+            results = iter(pipe.execute())
+
+            for post in posts:
+                if post.viewers_sketch:
+                    next(results)
+                _, sketch, unique_viewers, _ = (next(results) for _ in range(4))
+                post.viewers_sketch = sketch
+                post.unique_viewers = unique_viewers
+            Post.objects.bulk_update(posts, ['viewers_sketch', 'unique_viewers'])
+
+    @classmethod
+    def union_counts(cls, rows):
+        '''
+        Оценка уникальных зрителей объединений дневных скетчей: за весь период,
+        по дням и по постам - {'total': n, ('day', день): n, ('post', id): n}.
+        rows - (post_id, день, скетч) в порядке post_id, читаются потоком:
+        скетчи уходят в Redis пачками по BATCH_SIZE и сразу вливаются (PFMERGE)
+        в скетчи групп. В памяти - одна пачка, в Redis - скетч периода,
+        по скетчу на день и скетч текущего поста.
+        '''
+        client = get_redis()
+        prefix = f'{cls.PREFIX}tmp:{uuid.uuid4().hex}'
+        total_key = f'{prefix}:total'
+        day_keys = {}
+        counts = {}
+        post_id = post_key = None
+        rows = iter(rows)
+
+        while True:
+            batch = list(islice(rows, cls.BATCH_SIZE))
+            if not batch:
+                break
+
+            pipe = client.pipeline(transaction=False)
+            # Номер команды конвейера -> группа, чей PFCOUNT она возвращает
+            pending = {}
+            sketch_keys = []
+            for row_post_id, day, sketch in batch:
+                if row_post_id != post_id:
+                    if post_key is not None:
+                        # Пост закончился - его скетч больше не нужен
+                        pending[len(pipe)] = ('post', post_id)
+                        pipe.pfcount(post_key)
+                        pipe.delete(post_key)
+                    post_id, post_key = row_post_id, f'{prefix}:post:{row_post_id}'
+                if not sketch:
+                    continue
+
+                key = f'{prefix}:sketch:{len(sketch_keys)}'
+                sketch_keys.append(key)
+                day_key = day_keys.setdefault(day, f'{prefix}:day:{day:%Y%m%d}')
+                pipe.set(key, bytes(sketch), ex=cls.TEMP_TTL)
+                for group_key in (total_key, day_key, post_key):
+                    pipe.pfmerge(group_key, key)
+
+            if sketch_keys:
+                pipe.delete(*sketch_keys)
+            for key in (total_key, post_key, *day_keys.values()):
+                pipe.expire(key, cls.TEMP_TTL)
+            results = pipe.execute()
+            counts.update((group, results[index]) for index, group in pending.items())
+
+        pipe = client.pipeline(transaction=False)
+        groups = [('total', total_key), *((('day', day), key) for day, key in day_keys.items())]
+        if post_key is not None:
+            groups.append((('post', post_id), post_key))
+        for _, key in groups:
+            pipe.pfcount(key)
+        pipe.delete(*(key for _, key in groups))
+        counts.update(zip((group for group, _ in groups), pipe.execute()))
+        return counts
+
+
+def rebuild_category_stats():
+    '''Пересчёт счётчиков опубликованных постов во всех категориях одним UPDATE'''
+    published_posts = Post.objects.filter(
+        category=OuterRef('pk'), status='published'
+    ).order_by().values('category').annotate(total=Count('pk')).values('total')
+
+    return Category.objects.update(posts_count=Coalesce(Subquery(published_posts), 0))
@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+from apps.comments.models import Comment
+from .models import Category, Post
+
+
+EXPORT_OUTPUTS = ('ndjson', 'csv')
+
+# Ресурс -> (модель, столбцы, поле фильтра по времени)
+# У категорий нет updated_at - диапазон применяется к created_at
+EXPORT_RESOURCES = {
+    'posts': (Post, (
+        'id', 'title', 'slug', 'content', 'excerpt', 'category_id', 'author_id', 'status',
+        'created_at', 'updated_at', 'views_count', 'comments_count',
+    ), 'updated_at'),
+    'comments': (Comment, (
+        'id', 'post_id', 'author_id', 'parent_id', 'content', 'is_active', 'replies_count',
+        'created_at', 'updated_at',
+    ), 'updated_at'),
+    'categories': (Category, (
+        'id', 'name', 'slug', 'description', 'posts_count', 'created_at',
+    ), 'created_at'),
+}
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Сколько байт копится перед отправкой клиенту
+_FLUSH_SIZE = 64 * 1024
+
+
+def export_rows(resource, updated_from=None, updated_to=None):
+    '''
+    Строки ресурса в порядке id через серверный курсор (без него - пачками
+    по id): в памяти держится не больше EXPORT_CHUNK_SIZE строк.
+    '''
+    model, columns, time_field = EXPORT_RESOURCES[resource]
+    queryset = model.objects.all()
+    if updated_from is not None:
+        queryset = queryset.filter(**{f'{time_field}__gte': updated_from})
+    if updated_to is not None:
+        queryset = queryset.filter(**{f'{time_field}__lt': updated_to})
+
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    if connections[queryset.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        return columns, _keyset_rows(queryset, columns, chunk_size)
+    return columns, queryset.order_by('id').values_list(*columns).iterator(chunk_size=chunk_size)
+
+
+def _keyset_rows(queryset, columns, chunk_size):
+    '''
+    Без серверных курсоров (PgBouncer в режиме transaction) iterator()
+    получил бы весь результат разом - читаем пачками по id.
+    '''
+    id_index = columns.index('id')
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        rows = list(chunk.order_by('id').values_list(*columns)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][id_index]
+
+
+def _values(row):
+    '''Даты - в ISO 8601 с полной точностью, остальное как есть'''
+    return [value.isoformat() if isinstance(value, datetime) else value for value in row]
+
+
+def _ndjson_lines(columns, rows):
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, _values(row)))) + '\n'
+
+
+def _csv_lines(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    yield line(columns)
+    for row in rows:
+        yield line(_values(row))
+
+
+def _chunks(lines):
+    '''Строки -> блоки байт по ~_FLUSH_SIZE'''
+    parts = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        parts.append(data)
+        size += len(data)
+        if size >= _FLUSH_SIZE:
+            yield b''.join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield b''.join(parts)
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=31)  # формат gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(resource, output, updated_from=None, updated_to=None, gzip=False):
+    '''Потоковый ответ с выгрузкой ресурса в NDJSON или CSV (опционально gzip)'''
+    columns, rows = export_rows(resource, updated_from, updated_to)
+    lines = _csv_lines(columns, rows) if output == 'csv' else _ndjson_lines(columns, rows)
+    chunks = _chunks(lines)
+
+    filename = f'{resource}.{output}'
+    if gzip:
+        chunks = _gzip(chunks)
+        filename += '.gz'
+        content_type = 'application/gzip'
+    else:
+        content_type = CONTENT_TYPES[output]
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,93 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import serializers
+
+from .fieldsets import FIELDS_PARAM, OMIT_PARAM
+from .images import srcset_for_name
+from .models import Post
+from .pins import get_registry
+
+
+# Те же правила вывода дат, что и у полей DRF (текущая зона, ISO 8601, 'Z')
+_datetime = serializers.DateTimeField().to_representation
+
+
+def format_datetime(value):
+    return _datetime(value) if value else None
+
+
+def media_url(storage, name, request=None):
+    '''Ссылка на файл так же, как её строит FileField DRF'''
+    if not name:
+        return None
+    url = storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def fast_path_enabled(request):
+    '''Быстрый путь - только для полного набора полей (без ?fields=/?omit=)'''
+    if not settings.FAST_SERIALIZERS_ENABLED:
+        return False
+    params = request.query_params
+    return FIELDS_PARAM not in params and OMIT_PARAM not in params
+
+
+class PostListFastSerializer:
+    '''
+    Быстрый путь PostListSerializer для горячих списков.
+    Строки читаются одним values_list(), закрепление - из реестра
+    закреплений, поля собираются без экземпляров моделей и без
+    диспетчеризации по полям DRF. JSON совпадает с PostListSerializer побайтно.
+    '''
+
+    columns = (
+        'id', 'title', 'slug', 'excerpt', 'image', 'image_variants',
+        'category__name', 'author__email', 'status', 'created_at', 'updated_at',
+        'views_count', 'comments_count',
+    )
+
+    def __init__(self, request=None):
+        self.request = request
+        self.storage = Post._meta.get_field('image').storage
+
+    def rows(self, queryset):
+        return queryset.prefetch_related(None).values_list(*self.columns)
+
+    def serialize(self, queryset):
+        '''Список словарей для Response'''
+        return self.build(self.rows(queryset), get_registry())
+
+    async def aserialize(self, queryset):
+        '''То же для async-view: строки - через async ORM, реестр - в потоке (кэш синхронный)'''
+        rows = [row async for row in self.rows(queryset)]
+        return self.build(rows, await sync_to_async(get_registry)())
+
+    def build(self, rows, pins):
+        request = self.request
+        storage = self.storage
+
+        data = []
+        for (
+            id, title, slug, excerpt, image, image_variants,
+            category, author, status, created_at, updated_at,
+            views_count, comments_count,
+        ) in rows:
+            pinned_info = pins.pinned_info(id)
+            data.append({
+                'id': id,
+                'title': title,
+                'slug': slug,
+                'content': excerpt,
+                'image': media_url(storage, image, request),
+                'image_srcset': srcset_for_name(storage, image, image_variants, request) if image else None,
+                'category': category,
+                'author': author,
+                'status': status,
+                'created_at': format_datetime(created_at),
+                'updated_at': format_datetime(updated_at),
+                'views_count': views_count,
+                'comments_count': comments_count,
+                'is_pinned': pinned_info['is_pinned'],
+                'pinned_info': pinned_info,
+            })
+        return data
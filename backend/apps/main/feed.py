@@ -0,0 +1,252 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+from .pins import get_registry
+
+
+def active_pinned_post_ids(category=None):
+    '''ID закрепленных постов юзеров с активной подпиской в порядке закрепления'''
+    return get_registry().active_post_ids(category.pk if category is not None else None)
+
+
+def encode_position(position):
+    '''Позиция в ленте -> непрозрачная строка курсора'''
+    data = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def _decode(cursor):
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError('Invalid cursor')
+
+    if not isinstance(position, dict):
+        raise ValueError('Invalid cursor')
+    return position
+
+
+def _validate_keyset(position):
+    '''{'created_at', 'id'} - позиция в ленте по (-created_at, -id)'''
+    if not isinstance(position, dict) or 'created_at' not in position or 'id' not in position:
+        raise ValueError('Invalid cursor')
+    try:
+        datetime.fromisoformat(position['created_at'])
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(position['id'], int):
+        raise ValueError('Invalid cursor')
+    return position
+
+
+def _validate_position(position):
+    if not isinstance(position, dict):
+        raise ValueError('Invalid cursor')
+    if 'pin' in position:
+        if not isinstance(position['pin'], int) or position['pin'] < 0:
+            raise ValueError('Invalid cursor')
+        return position
+    return _validate_keyset(position)
+
+
+def decode_position(cursor):
+    '''Строка курсора -> позиция в ленте; ValueError при битом курсоре'''
+    if not cursor:
+        return {'pin': 0}
+    return _validate_position(_decode(cursor))
+
+
+def decode_overlay_position(cursor):
+    '''
+    Строка курсора -> позиция в ленте с черновиками (см. DraftsOverlayFeed);
+    ValueError при битом курсоре.
+    '''
+    if not cursor:
+        return {'public': {'pin': 0}, 'after': None, 'draft': None}
+
+    position = _decode(cursor)
+    if set(position) != {'public', 'after', 'draft'}:
+        raise ValueError('Invalid cursor')
+    for key in ('public', 'after'):
+        if position[key] is not None:
+            _validate_position(position[key])
+    if position['draft'] is not None:
+        _validate_keyset(position['draft'])
+    return position
+
+
+def keyset_position(post):
+    return {'created_at': post.created_at.isoformat(), 'id': post.id}
+
+
+def after_position(queryset, after=None):
+    '''Посты после позиции after, по (-created_at, -id)'''
+    if after is not None:
+        created_at = datetime.fromisoformat(after['created_at'])
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) |
+            Q(created_at=created_at, id__lt=after['id'])
+        )
+    return queryset.order_by('-created_at', '-id')
+
+
+def visible_pinned_ids(queryset, pinned_ids):
+    '''
+    Закрепленные из pinned_ids, попадающие в выборку (поиск, фильтры, права),
+    в порядке закрепления. Иначе смещения внутри закрепленных и их число
+    считались бы по глобальному списку, а страницы выходили бы короче.
+    '''
+    pinned_ids = list(pinned_ids)
+    if not pinned_ids:
+        return []
+    visible = set(queryset.filter(pk__in=pinned_ids).values_list('pk', flat=True))
+    return [post_id for post_id in pinned_ids if post_id in visible]
+
+
+class PinnedFirstFeed:
+    '''
+    Лента "закрепленные сверху".
+    Склеивает два потока: маленький список активных закреплений
+    (в порядке закрепления) и обычные посты по индексу -created_at.
+    Ни сортировки всей выборки, ни join'ов через подписки на каждый пост.
+
+    Позиция в ленте - либо {'pin': смещение} внутри закрепленных,
+    либо {'created_at', 'id'} последнего отданного обычного поста.
+    '''
+
+    def __init__(self, queryset, pinned_ids):
+        self.queryset = queryset
+        self.pinned_ids = visible_pinned_ids(queryset, pinned_ids)
+
+    def get_page(self, position, page_size):
+        '''Возврат (посты страницы, позиция следующей страницы или None)'''
+        posts = []
+
+        if 'pin' in position:
+            offset = position['pin']
+            pinned_slice = self.pinned_ids[offset:offset + page_size]
+            pinned = self.queryset.in_bulk(pinned_slice)
+            posts.extend(pinned[post_id] for post_id in pinned_slice if post_id in pinned)
+
+            if offset + page_size < len(self.pinned_ids):
+                return posts, {'pin': offset + page_size}
+            after = None
+        else:
+            after = position
+
+        limit = page_size - len(posts)
+        regular = list(self.regular_posts(after)[:limit + 1])
+        posts.extend(regular[:limit])
+
+        if len(regular) <= limit:
+            return posts, None
+        if limit == 0:
+            # Страница целиком из закрепленных - следующая начнется с обычных
+            return posts, {'pin': len(self.pinned_ids)}
+
+        return posts, keyset_position(regular[limit - 1])
+
+    def regular_posts(self, after=None):
+        '''Обычные посты после позиции after, по (-created_at, -id)'''
+        return after_position(self.queryset.exclude(id__in=self.pinned_ids), after)
+
+
+class DraftsOverlayFeed:
+    '''
+    Лента авторизованного юзера: общая лента опубликованных постов
+    и его собственные черновики, вклеенные по (-created_at, -id).
+
+    Общая лента читается готовыми страницами (их можно кэшировать и
+    делить между всеми юзерами): get_public_page(позиция) ->
+    {'items': [(ключ, ...)], 'next': позиция или None}, где ключ - None
+    у закрепленных (они всегда сверху) или (created_at, id).
+    Черновики - отдельный маленький запрос.
+
+    Позиция - {'public': страница общей ленты или None, если она кончилась,
+    'after': последний отданный элемент этой страницы - {'pin': сколько
+    закрепленных отдано} или {'created_at', 'id'} - либо None, 'draft': позиция
+    последнего отданного черновика или None}. Страницы общей ленты
+    запрашиваются по тем же позициям, что и у анонимов; уже отданные элементы
+    пропускаются по ключу, а не по номеру на странице: страница в кэше могла
+    быть пересобрана (новые посты, закрепления), и номера в ней сдвинулись.
+    '''
+
+    def __init__(self, get_public_page, drafts):
+        self.get_public_page = get_public_page
+        self.drafts = drafts
+
+    def get_page(self, position, page_size):
+        '''
+        Возврат (элементы страницы, позиция следующей страницы или None);
+        элемент - ('public', элемент страницы общей ленты) или ('draft', пост).
+        '''
+        public = []
+        anchor, after = position['public'], position['after']
+        while anchor is not None and len(public) < page_size:
+            page = self.get_public_page(anchor)
+            public.extend(
+                (anchor, index, page) for index in range(len(page['items']))
+                if not self._emitted(anchor, index, page, after)
+            )
+            anchor = page['next']
+
+        drafts = list(after_position(self.drafts, position['draft'])[:page_size + 1])
+
+        entries = []
+        last_public = last_draft = None
+        p = d = 0
+        while len(entries) < page_size and (p < len(public) or d < len(drafts)):
+            if d == len(drafts) or (p < len(public) and self._before(public[p], drafts[d])):
+                last_public = public[p]
+                _, index, page = last_public
+                entries.append(('public', page['items'][index]))
+                p += 1
+            else:
+                last_draft = drafts[d]
+                entries.append(('draft', last_draft))
+                d += 1
+
+        if p == len(public) and anchor is None and d == len(drafts):
+            return entries, None
+
+        next_position = dict(position)
+        if last_public is not None:
+            public_anchor, index, page = last_public
+            if index + 1 < len(page['items']):
+                next_position.update(public=public_anchor, after=self._item_position(public_anchor, index, page))
+            else:
+                next_position.update(public=page['next'], after=None)
+        if last_draft is not None:
+            next_position['draft'] = keyset_position(last_draft)
+        return entries, next_position
+
+    @staticmethod
+    def _item_position(anchor, index, page):
+        '''Позиция элемента общей ленты: закрепленный - по смещению, обычный - по ключу'''
+        key = page['items'][index][0]
+        if key is None:
+            # Закрепленные есть только на страницах от {'pin': смещение}
+            return {'pin': anchor['pin'] + index + 1}
+        created_at, post_id = key
+        return {'created_at': created_at.isoformat(), 'id': post_id}
+
+    @staticmethod
+    def _emitted(anchor, index, page, after):
+        '''Элемент общей ленты не позже позиции after - уже отдан'''
+        if after is None:
+            return False
+        key = page['items'][index][0]
+        if 'pin' in after:
+            return key is None and anchor['pin'] + index < after['pin']
+        return key is None or key >= (datetime.fromisoformat(after['created_at']), after['id'])
+
+    @staticmethod
+    def _before(public_entry, draft):
+        '''Элемент общей ленты идёт раньше черновика'''
+        _, index, page = public_entry
+        key = page['items'][index][0]
+        return key is None or key > (draft.created_at, draft.id)
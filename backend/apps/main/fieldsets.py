@@ -0,0 +1,181 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+# Ключ контекста с уже разобранным набором полей (см. nested_context)
+SPARSE_FIELDS_CONTEXT = 'sparse_fields'
+
+
+def _split(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def _select_related_paths(tree, prefix=''):
+    '''Дерево query.select_related -> список путей до листьев'''
+    paths = []
+    for name, subtree in tree.items():
+        path = f'{prefix}{name}'
+        paths.extend(_select_related_paths(subtree, f'{path}__') if subtree else [path])
+    return paths
+
+
+def _related(path, other):
+    return path == other or path.startswith(f'{other}__') or other.startswith(f'{path}__')
+
+
+class SparseFieldsetMixin:
+    '''
+    Разреженные наборы полей: ?fields=id,title или ?omit=content.
+    Лишние поля убираются из ответа, а sparse_queryset() отражает выбор
+    в запросе: only() по нужным столбцам и только нужные JOIN/prefetch.
+
+    Зависимости полей, которые нельзя вывести из модели, описываются в Meta:
+    - sparse_columns: поле -> столбцы модели (по умолчанию - столбец source);
+    - sparse_relations: поле -> пути select_related/prefetch_related.
+    '''
+
+    @classmethod
+    def sparse_field_names(cls, request):
+        '''
+        Запрошенные поля сериализатора или None, если выбор не ограничен.
+        Неизвестные имена в ?fields=/?omit= - ошибка 400 со списком этих имён.
+        '''
+        if request is None:
+            return None
+
+        params = request.query_params
+        if FIELDS_PARAM not in params and OMIT_PARAM not in params:
+            return None
+
+        available = set(cls.Meta.fields)
+        requested = {param: _split(params.get(param, '')) for param in (FIELDS_PARAM, OMIT_PARAM)}
+        errors = {
+            param: [f'Unknown fields: {", ".join(sorted(names - available))}']
+            for param, names in requested.items() if names - available
+        }
+        if errors:
+            raise ValidationError(errors)
+
+        names = available
+        if FIELDS_PARAM in params:
+            names &= requested[FIELDS_PARAM]
+        return names - requested[OMIT_PARAM]
+
+    def nested_context(self):
+        '''
+        Контекст для сериализатора, вложенного в этот ответ вручную:
+        ?fields=/?omit= проверены по полям внешнего сериализатора.
+        '''
+        return {**self.context, SPARSE_FIELDS_CONTEXT: self.sparse_field_names(self.context.get('request'))}
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        # Только сериализатор верхнего уровня (или элемент списка)
+        root = self.root
+        if root is not self and self.parent is not root:
+            return fields
+
+        if SPARSE_FIELDS_CONTEXT in self.context:
+            # Вложенный сериализатор ответа: набор полей уже разобран внешним
+            names = self.context[SPARSE_FIELDS_CONTEXT]
+        else:
+            names = self.sparse_field_names(self.context.get('request'))
+        if names is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in names}
+
+    @classmethod
+    def _field_columns(cls, name):
+        columns = getattr(cls.Meta, 'sparse_columns', {})
+        if name in columns:
+            return list(columns[name])
+
+        source = cls._declared_fields[name].source if name in cls._declared_fields else None
+        source = source or name
+        try:
+            cls.Meta.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return []
+        return [source]
+
+    @classmethod
+    def _field_relations(cls, name):
+        return list(getattr(cls.Meta, 'sparse_relations', {}).get(name, []))
+
+    @classmethod
+    def sparse_queryset(cls, queryset, request, required=()):
+        '''
+        Queryset под запрошенный набор полей.
+        required - столбцы, нужные самому view (сортировка, валидаторы и т.п.).
+        JOIN-ы, которые нужны только отброшенным полям, снимаются;
+        JOIN-ы неизвестного назначения остаются.
+        '''
+        names = cls.sparse_field_names(request)
+        if names is None:
+            return queryset
+
+        kept = set()
+        dropped = set()
+        for name in cls.Meta.fields:
+            (kept if name in names else dropped).update(cls._field_relations(name))
+
+        def needed(path):
+            if any(_related(path, relation) for relation in kept):
+                return True
+            return not any(_related(path, relation) for relation in dropped)
+
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            paths = [path for path in _select_related_paths(select_related) if needed(path)]
+            queryset = queryset.select_related(None)
+            if paths:
+                # select_related() без аргументов включил бы все связи
+                queryset = queryset.select_related(*paths)
+        else:
+            paths = []
+
+        lookups = queryset._prefetch_related_lookups
+        if lookups:
+            queryset = queryset.prefetch_related(None).prefetch_related(
+                *[lookup for lookup in lookups if needed(getattr(lookup, 'prefetch_to', lookup))]
+            )
+
+        columns = set(required)
+        for name in names:
+            columns.update(cls._field_columns(name))
+
+        # Прямые связи из select_related нельзя откладывать
+        model_meta = cls.Meta.model._meta
+        for path in paths:
+            field = model_meta.get_field(path.split('__')[0])
+            if field.concrete:
+                columns.add(field.name)
+
+        ordering = queryset.query.order_by or model_meta.ordering
+        columns.update(field.lstrip('-') for field in ordering if isinstance(field, str))
+
+        def is_column(name):
+            try:
+                return model_meta.get_field(name).concrete
+            except FieldDoesNotExist:
+                # pk, аннотации, пути через связи
+                return False
+
+        return queryset.only(*filter(is_column, columns))
+
+
+class SparseFieldsetViewMixin:
+    '''Применяет ?fields=/?omit= сериализатора к queryset-у GET-запросов'''
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        serializer_class = self.get_serializer_class()
+        if self.request.method != 'GET' or not hasattr(serializer_class, 'sparse_queryset'):
+            return queryset
+
+        required = getattr(self, 'validator_fields', ())
+        return serializer_class.sparse_queryset(queryset, self.request, required)
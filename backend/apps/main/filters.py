@@ -0,0 +1,19 @@
+from django.contrib.postgres.search import SearchQuery
+from rest_framework import filters
+
+from .models import Post
+
+
+def build_search_query(terms):
+    '''Поисковый запрос в синтаксисе websearch ("фраза", -исключение, or)'''
+    return SearchQuery(terms, search_type='websearch', config=Post.SEARCH_CONFIG)
+
+
+class PostSearchFilter(filters.SearchFilter):
+    '''?search= по полнотекстовому GIN-индексу вместо LIKE-сканов по content'''
+
+    def filter_queryset(self, request, queryset, view):
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+        return queryset.filter(search_vector=build_search_query(terms))
@@ -0,0 +1,135 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .feed import active_pinned_post_ids
+from .models import Category, Post, PostRanking
+from .ranking import ranked_posts
+from .serializers import CategorySerializer, PostListSerializer
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_KEY = 'homepage:bundle'
+REBUILD_SCHEDULED_KEY = 'homepage:rebuild-scheduled'
+
+RECENT_LIMIT = 10
+POPULAR_LIMIT = 10
+FEATURED_PINNED_LIMIT = 3
+FEATURED_POPULAR_LIMIT = 6
+
+
+def published_posts():
+    return Post.objects.with_subscription_info().filter(
+        status='published'
+    ).defer(*Post.LIST_DEFERRED_FIELDS)
+
+
+def recent_posts(limit=RECENT_LIMIT):
+    return published_posts().order_by('-created_at')[:limit]
+
+
+def popular_posts(posts=None, scope=PostRanking.GLOBAL_SCOPE, limit=POPULAR_LIMIT, evaluate=list):
+    '''
+    "Горячие" посты из рейтинга; пока рейтинг не рассчитан - по просмотрам.
+    evaluate - как получить результат из queryset-а (list или быстрый сериализатор).
+    '''
+    posts = published_posts() if posts is None else posts
+
+    ranked = evaluate(ranked_posts(posts, scope, limit))
+    if not ranked:
+        ranked = evaluate(posts.order_by('-views_count')[:limit])
+    return ranked
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def apopular_posts(posts=None, scope=PostRanking.GLOBAL_SCOPE, limit=POPULAR_LIMIT, evaluate=_alist):
+    '''popular_posts() для async-view: evaluate - корутина (aserialize быстрого сериализатора)'''
+    posts = published_posts() if posts is None else posts
+
+    ranked = await evaluate(ranked_posts(posts, scope, limit))
+    if not ranked:
+        ranked = await evaluate(posts.order_by('-views_count')[:limit])
+    return ranked
+
+
+def featured_posts():
+    '''
+    Рек. посты: первые закрепленные и "горячие" без них.
+    Возврат (закрепленные, популярные, всего закрепленных);
+    закрепленные посты запрашиваются один раз - по списку их id.
+    '''
+    pinned_ids = active_pinned_post_ids()
+    pinned = list(
+        Post.objects.pinned_posts()
+        .filter(id__in=pinned_ids[:FEATURED_PINNED_LIMIT])
+        .defer(*Post.LIST_DEFERRED_FIELDS)
+    )
+
+    posts = published_posts().exclude(id__in=[post.id for post in pinned])
+    popular = list(ranked_posts(posts, PostRanking.GLOBAL_SCOPE, FEATURED_POPULAR_LIMIT))
+
+    if not popular:
+        # Рейтинг ещё не рассчитан - популярные за неделю
+        week_ago = timezone.now() - timedelta(days=7)
+        popular = list(
+            posts.filter(created_at__gte=week_ago).order_by('-views_count')[:FEATURED_POPULAR_LIMIT]
+        )
+    return pinned, popular, len(pinned_ids)
+
+
+def build_bundle(context=None):
+    '''Все секции главной страницы одним словарём'''
+    context = context or {}
+    pinned, featured_popular, total_pinned = featured_posts()
+
+    return {
+        'featured': {
+            'pinned_posts': PostListSerializer(pinned, many=True, context=context).data,
+            'popular_posts': PostListSerializer(featured_popular, many=True, context=context).data,
+            'total_pinned': total_pinned,
+        },
+        'recent': PostListSerializer(recent_posts(), many=True, context=context).data,
+        'popular': PostListSerializer(popular_posts(), many=True, context=context).data,
+        'categories': CategorySerializer(Category.objects.all(), many=True, context=context).data,
+        'generated_at': timezone.now(),
+    }
+
+
+def rebuild_bundle():
+    '''Пересборка бандла в кэше; ссылки на медиа без хоста (запроса нет)'''
+    bundle = build_bundle()
+    cache.set(BUNDLE_KEY, bundle, settings.HOMEPAGE_BUNDLE_TTL)
+    return bundle
+
+
+def get_bundle():
+    '''Одно чтение из кэша; при промахе бандл собирается на месте'''
+    bundle = cache.get(BUNDLE_KEY)
+    if bundle is None:
+        bundle = rebuild_bundle()
+    return bundle
+
+
+def schedule_rebuild():
+    '''
+    Отложенная пересборка после изменения данных.
+    Серия изменений за HOMEPAGE_BUNDLE_REBUILD_DELAY сек. даёт одну пересборку.
+    '''
+    from .tasks import rebuild_homepage_bundle
+
+    delay = settings.HOMEPAGE_BUNDLE_REBUILD_DELAY
+    if not cache.add(REBUILD_SCHEDULED_KEY, 1, delay):
+        return
+
+    try:
+        rebuild_homepage_bundle.apply_async(countdown=delay)
+    except Exception as e:
+        # Брокер недоступен - бандл обновится по расписанию
+        cache.delete(REBUILD_SCHEDULED_KEY)
+        logger.warning(f'Failed to schedule homepage bundle rebuild: {e}')
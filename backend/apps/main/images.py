@@ -0,0 +1,166 @@
+import logging
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Форматы производных: (формат Pillow, расширение, параметры сохранения)
+VARIANT_FORMATS = (
+    ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+# Поля изображений: (модель, поле файла, поле производных, набор ширин)
+IMAGE_FIELDS = {
+    'post_image': ('main.Post', 'image', 'image_variants', 'post'),
+    'user_avatar': ('accounts.User', 'avatar', 'avatar_variants', 'avatar'),
+}
+
+
+def variants_dir(name):
+    directory, filename = posixpath.split(name)
+    stem, _ = posixpath.splitext(filename)
+    return posixpath.join(directory, 'variants', stem)
+
+
+def generate_variants(field_file, widths):
+    '''
+    Уменьшенные копии изображения во всех форматах VARIANT_FORMATS.
+    Ширины больше исходной пропускаются - апскейл только раздувает файлы.
+    Возврат описания для JSON-поля модели.
+    '''
+    storage = field_file.storage
+    with field_file.open('rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    width, height = image.size
+    target_widths = sorted({w for w in widths if w < width} | {min(min(widths), width)})
+
+    variants = []
+    for target_width in target_widths:
+        target_height = max(round(height * target_width / width), 1)
+        resized = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+
+        for image_format, extension, options in VARIANT_FORMATS:
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            name = storage.save(
+                f'{variants_dir(field_file.name)}/{target_width}w.{extension}',
+                ContentFile(buffer.getvalue()),
+            )
+            variants.append({
+                'name': name,
+                'format': extension,
+                'width': target_width,
+                'height': target_height,
+            })
+
+    return {
+        'source': field_file.name,
+        'width': width,
+        'height': height,
+        'variants': variants,
+    }
+
+
+def delete_variants(storage, data):
+    for variant in (data or {}).get('variants', []):
+        try:
+            storage.delete(variant['name'])
+        except OSError as e:
+            logger.warning(f'Failed to delete image variant {variant["name"]}: {e}')
+
+
+def process_image(kind, pk):
+    '''
+    Генерация производных для объекта и сохранение их описания.
+    Если файл успел смениться, результат не записывается - следующую
+    обработку запланирует сигнал сохранения.
+    '''
+    model_label, file_field, variants_field, widths_key = IMAGE_FIELDS[kind]
+    model = apps.get_model(model_label)
+
+    instance = model.objects.filter(pk=pk).only(file_field, variants_field).first()
+    if instance is None:
+        return None
+
+    field_file = getattr(instance, file_field)
+    previous = getattr(instance, variants_field)
+    if not field_file:
+        model.objects.filter(pk=pk).update(**{variants_field: {}})
+        delete_variants(field_file.storage, previous)
+        return None
+
+    if (previous or {}).get('source') == field_file.name:
+        return previous
+
+    data = generate_variants(field_file, settings.IMAGE_VARIANT_WIDTHS[widths_key])
+    updated = model.objects.filter(pk=pk, **{file_field: field_file.name}).update(
+        **{variants_field: data}
+    )
+    if updated:
+        from .homepage import schedule_rebuild
+        from .response_cache import invalidate_tags, POSTS_TAG
+
+        delete_variants(field_file.storage, previous)
+        # Закэшированные ответы и бандл главной ссылаются на оригиналы
+        invalidate_tags(POSTS_TAG)
+        schedule_rebuild()
+    else:
+        delete_variants(field_file.storage, data)
+    return data
+
+
+def schedule_processing(kind, pk):
+    '''Фоновая обработка после фиксации транзакции: запрос не ждёт Pillow'''
+    from .tasks import process_image_variants
+
+    def enqueue():
+        try:
+            process_image_variants.delay(kind, pk)
+        except Exception as e:
+            # Брокер недоступен - производные догенерирует generate_image_variants
+            logger.warning(f'Failed to schedule image processing for {kind} {pk}: {e}')
+
+    transaction.on_commit(enqueue)
+
+
+def srcset(field_file, data, request=None):
+    '''
+    srcset-карта для клиента:
+    {'src', 'width', 'height', 'srcset': {'webp': 'url 320w, ...', 'jpg': ...}}.
+    Пока производные не готовы (или устарели), srcset пуст, а src - оригинал.
+    '''
+    if not field_file:
+        return None
+    return srcset_for_name(field_file.storage, field_file.name, data, request)
+
+
+def srcset_for_name(storage, name, data, request=None):
+    '''srcset-карта по имени файла в хранилище (без FieldFile)'''
+    def absolute(url):
+        return request.build_absolute_uri(url) if request else url
+
+    result = {'src': absolute(storage.url(name)), 'width': None, 'height': None, 'srcset': {}}
+    if not data or data.get('source') != name:
+        return result
+
+    result['width'] = data['width']
+    result['height'] = data['height']
+    candidates = {}
+    for variant in data['variants']:
+        candidates.setdefault(variant['format'], []).append(
+            f"{absolute(storage.url(variant['name']))} {variant['width']}w"
+        )
+    result['srcset'] = {image_format: ', '.join(urls) for image_format, urls in candidates.items()}
+    return result
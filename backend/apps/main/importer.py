@@ -0,0 +1,241 @@
+import codecs
+import csv
+import json
+import time
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from . import sitemaps
+from .homepage import schedule_rebuild as schedule_homepage_rebuild
+from .models import Category, Post
+from .response_cache import invalidate_tags, POSTS_TAG
+from .signals import shift_category_posts_count
+
+
+IMPORT_FORMATS = ('jsonl', 'csv')
+
+# Сколько ошибок по отдельным записям попадает в отчёт
+MAX_REPORTED_ERRORS = 20
+
+# Сколько раз пачка перевыделяет слаги, если их заняли параллельно
+SLUG_ALLOCATION_ATTEMPTS = 3
+
+_STATUSES = {value for value, _ in Post.STATUS_CHOICES}
+_TITLE_MAX_LENGTH = Post._meta.get_field('title').max_length
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(name, default='jsonl'):
+    '''Формат по расширению файла'''
+    name = (name or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return default
+
+
+def decode_lines(chunks, encoding='utf-8-sig'):
+    '''Строки байтов (файл, загрузка) -> строки текста, без чтения целиком'''
+    return codecs.iterdecode(chunks, encoding)
+
+
+def read_records(lines, format):
+    '''
+    Поток записей (номер строки, dict) из JSONL или CSV.
+    Вход читается построчно - память не зависит от размера файла.
+    '''
+    if format not in IMPORT_FORMATS:
+        raise ImportFormatError(f'Unknown format: {format}')
+
+    if format == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, ImportFormatError(f'Invalid JSON: {e}')
+            continue
+        yield line_number, record if isinstance(record, dict) else ImportFormatError('Expected an object')
+
+
+class PostImporter:
+    '''
+    Массовая загрузка постов пачками по batch_size:
+    - авторы и категории пачки - одним запросом на пачку;
+    - слаги - Post.allocate_slugs(), один запрос на пачку;
+    - вставка - bulk_create, каждая пачка в своей транзакции; если слаг
+      успели занять параллельно (IntegrityError), слаги пачки выделяются
+      заново и вставка повторяется.
+
+    bulk_create не вызывает save() и сигналы, поэтому анонс и счётчики
+    категорий считаются здесь же, а кэши сбрасываются один раз в конце.
+
+    Поля записи: title, content, category (имя), status, slug, author (email).
+    '''
+
+    def __init__(self, default_author=None, batch_size=None):
+        self.default_author = default_author
+        self.batch_size = batch_size or settings.POST_IMPORT_BATCH_SIZE
+        self.categories = {}
+
+    def run(self, records, progress=None):
+        '''
+        Импорт потока записей из read_records().
+        progress(stats) вызывается после каждой пачки.
+        '''
+        stats = {
+            'created': 0,
+            'skipped': 0,
+            'batches': 0,
+            'elapsed': 0.0,
+            'rows_per_second': 0.0,
+            'errors': [],
+        }
+        started = time.monotonic()
+        records = iter(records)
+
+        try:
+            while True:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    break
+
+                stats['created'] += self.import_batch(batch, stats)
+                stats['batches'] += 1
+                stats['elapsed'] = round(time.monotonic() - started, 3)
+                stats['rows_per_second'] = round(stats['created'] / stats['elapsed'], 1) if stats['elapsed'] else 0.0
+
+                if progress is not None:
+                    progress(stats)
+        finally:
+            if stats['created']:
+                invalidate_tags(POSTS_TAG)
+                transaction.on_commit(schedule_homepage_rebuild)
+                transaction.on_commit(sitemaps.schedule_update)
+
+        return stats
+
+    def import_batch(self, batch, stats):
+        '''Одна пачка: проверка, слаги, bulk_create и счётчики категорий'''
+        authors = self._resolve_authors(batch)
+        categories = self._resolve_categories(batch)
+
+        posts = []
+        for line_number, record in batch:
+            try:
+                posts.append(self._build_post(record, authors, categories))
+            except (ImportFormatError, TypeError) as e:
+                self._error(stats, line_number, e)
+
+        if not posts:
+            return 0
+
+        published = Counter(
+            post.category_id for post in posts
+            if post.status == 'published' and post.category_id is not None
+        )
+
+        sources = [post.slug or post.title for post in posts]
+        for attempt in range(1, SLUG_ALLOCATION_ATTEMPTS + 1):
+            for post, slug in zip(posts, Post.allocate_slugs(sources)):
+                post.slug = slug
+            try:
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts, batch_size=self.batch_size)
+                    for category_id, count in published.items():
+                        shift_category_posts_count(category_id, count)
+                break
+            except IntegrityError:
+                if attempt == SLUG_ALLOCATION_ATTEMPTS:
+                    raise
+
+        sitemaps.mark_posts_changed({post.pk for post in posts})
+
+        return len(posts)
+
+    def _error(self, stats, line_number, error):
+        stats['skipped'] += 1
+        if len(stats['errors']) < MAX_REPORTED_ERRORS:
+            stats['errors'].append({'line': line_number, 'error': str(error)})
+
+    def _resolve_authors(self, batch):
+        '''email -> id авторов пачки одним запросом'''
+        emails = {
+            record['author'] for _, record in batch
+            if isinstance(record, dict) and isinstance(record.get('author'), str)
+        }
+        if not emails:
+            return {}
+        return dict(
+            get_user_model().objects.filter(email__in=emails).values_list('email', 'id')
+        )
+
+    def _resolve_categories(self, batch):
+        '''Имя -> id категорий; известные категории запоминаются между пачками'''
+        names = {
+            record['category'] for _, record in batch
+            if isinstance(record, dict) and isinstance(record.get('category'), str)
+        } - self.categories.keys()
+        if names:
+            self.categories.update(
+                Category.objects.filter(name__in=names).values_list('name', 'id')
+            )
+        return self.categories
+
+    def _build_post(self, record, authors, categories):
+        if isinstance(record, Exception):
+            raise record
+
+        title = record.get('title')
+        content = record.get('content')
+        if not isinstance(title, str) or not title.strip():
+            raise ImportFormatError('Title is required')
+        title = title.strip()
+        if len(title) > _TITLE_MAX_LENGTH:
+            raise ImportFormatError(f'Title is longer than {_TITLE_MAX_LENGTH} characters')
+        if not content or not isinstance(content, str):
+            raise ImportFormatError('Content is required')
+
+        status = record.get('status') or 'published'
+        if status not in _STATUSES:
+            raise ImportFormatError(f'Unknown status: {status}')
+
+        if record.get('author'):
+            author_id = authors.get(record['author'])
+            if author_id is None:
+                raise ImportFormatError(f"Unknown author: {record['author']}")
+        elif self.default_author is not None:
+            author_id = self.default_author.pk
+        else:
+            raise ImportFormatError('Author is required')
+
+        category_id = None
+        if record.get('category'):
+            category_id = categories.get(record['category'])
+            if category_id is None:
+                raise ImportFormatError(f"Unknown category: {record['category']}")
+
+        return Post(
+            title=title,
+            slug=record.get('slug') or '',
+            content=content,
+            excerpt=Post.make_excerpt(content),
+            category_id=category_id,
+            author_id=author_id,
+            status=status,
+        )
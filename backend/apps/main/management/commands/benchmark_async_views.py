@@ -0,0 +1,233 @@
+import asyncio
+import io
+import statistics
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import path
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.comments import views as comment_views
+from apps.main import views as post_views
+from apps.main.models import Post
+from apps.payment import views as payment_views
+from apps.payment.models import Payment
+from apps.subscribe import views as subscribe_views
+
+
+# (имя, маршрут, sync-view, async-view, нужен ли юзер)
+ENDPOINTS = [
+    ('recent_posts', 'recent/', post_views.recent_posts, post_views.recent_posts_async, False),
+    ('popular_posts', 'popular/', post_views.popular_posts, post_views.popular_posts_async, False),
+    ('post_comments', 'comments/<int:post_id>/', comment_views.post_comments, comment_views.post_comments_async, False),
+    ('subscription_status', 'subscription/', subscribe_views.subscription_status, subscribe_views.subscription_status_async, True),
+    ('payment_status', 'payment/<int:payment_id>/', payment_views.payment_status, payment_views.payment_status_async, True),
+]
+
+
+def _urlconf(name, async_views):
+    '''URLconf только из вариантов эндпоинтов одного развёртывания'''
+    module = types.ModuleType(name)
+    module.urlpatterns = [
+        path(route, async_view if async_views else sync_view, name=endpoint)
+        for endpoint, route, sync_view, async_view, _ in ENDPOINTS
+    ]
+    return module
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests in flight per worker on hot read endpoints: sync views '
+        'under a threaded WSGI worker vs async views under one ASGI event loop'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and deployment')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent clients')
+        parser.add_argument('--threads', type=int, default=8, help='Threads of the WSGI worker (gunicorn --threads)')
+        parser.add_argument('--user', help='Username for authenticated requests (default: first active user)')
+        parser.add_argument('--anonymous', action='store_true',
+                            help='Public endpoints without a token: anonymous responses come from the response cache')
+        parser.add_argument('--endpoint', action='append', choices=[endpoint[0] for endpoint in ENDPOINTS])
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        token = str(AccessToken.for_user(user)) if user is not None else None
+
+        paths = self.get_paths(user)
+        selected = options['endpoint'] or [endpoint[0] for endpoint in ENDPOINTS]
+        needs_user = {endpoint: needs for endpoint, *_, needs in ENDPOINTS}
+
+        wsgi = _urlconf('benchmark_wsgi_urls', async_views=False)
+        asgi = _urlconf('benchmark_asgi_urls', async_views=True)
+
+        for endpoint in selected:
+            if endpoint not in paths:
+                self.stdout.write(self.style.WARNING(f'{endpoint}: skipped (no data)'))
+                continue
+
+            url = paths[endpoint]
+            authorization = token if needs_user[endpoint] or not options['anonymous'] else None
+            if needs_user[endpoint] and authorization is None:
+                self.stdout.write(self.style.WARNING(f'{endpoint}: skipped (no user)'))
+                continue
+
+            with override_settings(ROOT_URLCONF=wsgi):
+                wsgi_body = self.ensure_ok(endpoint, *self.wsgi_request(WSGIHandler(), url, authorization))
+                wsgi_stats = self.run_wsgi(url, authorization, options)
+            with override_settings(ROOT_URLCONF=asgi):
+                asgi_body = self.ensure_ok(endpoint, *asyncio.run(self.asgi_request(ASGIHandler(), url, authorization)))
+                asgi_stats = asyncio.run(self.run_asgi(url, authorization, options))
+
+            if wsgi_body != asgi_body:
+                raise CommandError(f'{endpoint}: async view output differs from the sync view')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{endpoint} ({url})'))
+            self.report(f'wsgi, {options["threads"]} threads', wsgi_stats)
+            self.report('asgi, 1 event loop', asgi_stats)
+
+    def get_user(self, username):
+        users = get_user_model().objects.filter(is_active=True)
+        if username is None:
+            return users.order_by('pk').first()
+        user = users.filter(username=username).first()
+        if user is None:
+            raise CommandError(f'Active user "{username}" not found')
+        return user
+
+    def get_paths(self, user):
+        paths = {'recent_posts': '/recent/', 'popular_posts': '/popular/'}
+
+        post_id = Post.objects.filter(status='published').order_by('-comments_count').values_list('id', flat=True).first()
+        if post_id is not None:
+            paths['post_comments'] = f'/comments/{post_id}/'
+
+        if user is not None:
+            paths['subscription_status'] = '/subscription/'
+            # Платежи в ожидании опрашивают Stripe - бенчмарк не должен ходить во внешний API
+            payment_id = Payment.objects.filter(user=user).exclude(
+                status__in=['pending', 'processing']
+            ).order_by('-id').values_list('id', flat=True).first()
+            if payment_id is not None:
+                paths['payment_status'] = f'/payment/{payment_id}/'
+        return paths
+
+    def ensure_ok(self, endpoint, status, body, elapsed):
+        if status != 200:
+            raise CommandError(f'{endpoint}: HTTP {status}: {body[:200]!r}')
+        return body
+
+    def wsgi_request(self, handler, url, authorization):
+        environ = {'PATH_INFO': url, 'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO()}
+        setup_testing_defaults(environ)
+        if authorization:
+            environ['HTTP_AUTHORIZATION'] = f'Bearer {authorization}'
+
+        started = time.perf_counter()
+        status = []
+        response = handler(environ, lambda line, headers: status.append(int(line.split()[0])))
+        try:
+            body = b''.join(response)
+        finally:
+            response.close()
+        return status[0], body, time.perf_counter() - started
+
+    async def asgi_request(self, handler, url, authorization):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': url, 'raw_path': url.encode(),
+            'root_path': '', 'query_string': b'',
+            'headers': [(b'host', b'127.0.0.1')],
+            'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 80),
+        }
+        if authorization:
+            scope['headers'].append((b'authorization', f'Bearer {authorization}'.encode()))
+
+        body_sent = False
+        disconnected = asyncio.Event()
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Клиент не отключается: Django снимает это ожидание после ответа
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        status = []
+        chunks = []
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        started = time.perf_counter()
+        await handler(scope, receive, send)
+        return status[0], b''.join(chunks), time.perf_counter() - started
+
+    def run_wsgi(self, url, authorization, options):
+        '''
+        Воркер с пулом потоков (gunicorn --threads): клиентов больше, чем
+        потоков, лишние ждут свободный поток; ожидание входит в задержку.
+        '''
+        handler = WSGIHandler()
+        worker_threads = threading.Semaphore(options['threads'])
+        requests = iter(range(options['requests']))
+        lock = threading.Lock()
+        latencies, busy = [], []
+
+        def client():
+            while True:
+                with lock:
+                    if next(requests, None) is None:
+                        return
+                queued = time.perf_counter()
+                with worker_threads:
+                    status, body, elapsed = self.wsgi_request(handler, url, authorization)
+                latencies.append(time.perf_counter() - queued)
+                busy.append(elapsed)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as clients:
+            for _ in range(options['concurrency']):
+                clients.submit(client)
+        return time.perf_counter() - started, latencies, busy
+
+    async def run_asgi(self, url, authorization, options):
+        '''Один цикл событий (uvicorn worker): все клиенты обслуживаются сразу'''
+        handler = ASGIHandler()
+        requests = iter(range(options['requests']))
+        latencies = []
+
+        async def client():
+            while next(requests, None) is not None:
+                status, body, elapsed = await self.asgi_request(handler, url, authorization)
+                latencies.append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(options['concurrency'])))
+        return time.perf_counter() - started, latencies, latencies
+
+    def report(self, label, stats):
+        wall, latencies, busy = stats
+        latencies = sorted(latencies)
+        p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+        # Закон Литтла: среднее число запросов, которые воркер обрабатывает одновременно
+        in_flight = sum(busy) / wall
+
+        self.stdout.write(
+            f'  {label}: {len(latencies) / wall:.1f} req/s, '
+            f'p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, '
+            f'{in_flight:.1f} requests in flight'
+        )
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.comments.fast_serializers import CommentFastSerializer
+from apps.comments.serializers import CommentDetailSerializer
+from apps.comments.views import top_level_comments
+from apps.main import homepage
+from apps.main.fast_serializers import PostListFastSerializer
+from apps.main.models import Post
+from apps.main.serializers import PostListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF serializers with the values()-based fast path on hot endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--post', type=int, help='Post id for the comments benchmark (default: most commented)')
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get('/'))
+        renderer = JSONRenderer()
+
+        def drf_posts(queryset):
+            return PostListSerializer(queryset, many=True, context={'request': request}).data
+
+        fast_posts = PostListFastSerializer(request).serialize
+
+        cases = [
+            ('recent', lambda: drf_posts(homepage.recent_posts()),
+             lambda: fast_posts(homepage.recent_posts())),
+            ('popular', lambda: drf_posts(homepage.popular_posts()),
+             lambda: homepage.popular_posts(evaluate=fast_posts)),
+        ]
+
+        post_id = options['post']
+        if post_id is None:
+            post_id = Post.objects.order_by('-comments_count').values_list('id', flat=True).first()
+        if post_id is not None:
+            def comments():
+                return top_level_comments(post_id)
+
+            cases.append((
+                f'post_comments ({post_id})',
+                lambda: CommentDetailSerializer(comments(), many=True, context={'request': request}).data,
+                lambda: CommentFastSerializer(request).serialize(comments()),
+            ))
+
+        for name, drf, fast in cases:
+            if renderer.render(drf()) != renderer.render(fast()):
+                raise CommandError(f'{name}: fast path output differs from DRF')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, build in (('drf', drf), ('fast', fast)):
+                with CaptureQueriesContext(connection) as queries:
+                    renderer.render(build())
+
+                started = time.perf_counter()
+                for _ in range(options['iterations']):
+                    renderer.render(build())
+                elapsed = (time.perf_counter() - started) / options['iterations'] * 1000
+
+                self.stdout.write(f'  {label}: {elapsed:.2f} ms/op, {len(queries)} queries')
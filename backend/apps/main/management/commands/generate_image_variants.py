@@ -0,0 +1,28 @@
+from django.apps import apps
+from django.core.management import BaseCommand
+
+from apps.main.images import IMAGE_FIELDS, process_image
+
+
+class Command(BaseCommand):
+    help = 'Generate missing or stale resized variants of post images and avatars'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(IMAGE_FIELDS), help='Process only this kind of images')
+
+    def handle(self, *args, **options):
+        kinds = [options['kind']] if options['kind'] else sorted(IMAGE_FIELDS)
+
+        for kind in kinds:
+            model_label, file_field, _, _ = IMAGE_FIELDS[kind]
+            model = apps.get_model(model_label)
+
+            processed = 0
+            pks = (
+                model.objects.exclude(**{file_field: ''}).exclude(**{f'{file_field}__isnull': True})
+                .order_by('pk').values_list('pk', flat=True)
+            )
+            for pk in pks.iterator():
+                if process_image(kind, pk):
+                    processed += 1
+            self.stdout.write(self.style.SUCCESS(f'{kind}: обработано {processed} изображений'))
@@ -0,0 +1,47 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+
+from apps.main.importer import IMPORT_FORMATS, PostImporter, detect_format, read_records
+
+
+class Command(BaseCommand):
+    help = 'Bulk import posts from a JSONL or CSV file ("-" for stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Input format (default: by file extension)')
+        parser.add_argument('--author', help='Email of the author for records without "author"')
+        parser.add_argument('--batch-size', type=int, help='Rows per bulk_create batch')
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            try:
+                author = get_user_model().objects.get(email=options['author'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Author {options['author']} not found")
+
+        path = options['path']
+        format = options['format'] or detect_format(path)
+        importer = PostImporter(default_author=author, batch_size=options['batch_size'])
+
+        def progress(stats):
+            self.stdout.write(
+                f"batch {stats['batches']}: {stats['created']} created, {stats['skipped']} skipped, "
+                f"{stats['rows_per_second']} rows/s"
+            )
+
+        if path == '-':
+            stats = importer.run(read_records(sys.stdin, format), progress)
+        else:
+            with open(path, encoding='utf-8-sig', newline='') as lines:
+                stats = importer.run(read_records(lines, format), progress)
+
+        for error in stats['errors']:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Импортировано {stats['created']} постов за {stats['elapsed']} с "
+            f"({stats['rows_per_second']} rows/s), пропущено {stats['skipped']}"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from apps.main.counters import rebuild_category_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild published posts counters of categories'
+
+    def handle(self, *args, **options):
+        updated = rebuild_category_stats()
+        self.stdout.write(self.style.SUCCESS(f'Статистика пересчитана для {updated} категорий'))
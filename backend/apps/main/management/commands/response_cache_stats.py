@@ -0,0 +1,22 @@
+from django.core.management import BaseCommand
+
+from apps.main.response_cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset counters after showing them')
+
+    def handle(self, *args, **options):
+        for endpoint, counters in get_stats().items():
+            total = counters['hit'] + counters['miss']
+            ratio = counters['hit'] / total * 100 if total else 0
+            self.stdout.write(
+                f"{endpoint}: hit={counters['hit']} miss={counters['miss']} ({ratio:.1f}% hits)"
+            )
+
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('Счётчики сброшены'))
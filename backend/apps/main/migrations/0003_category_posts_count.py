@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_category_posts_count(apps, schema_editor):
+    Category = apps.get_model('main', 'Category')
+    Post = apps.get_model('main', 'Post')
+
+    published_posts = Post.objects.filter(
+        category=OuterRef('pk'), status='published'
+    ).order_by().values('category').annotate(total=Count('pk')).values('total')
+    Category.objects.update(posts_count=Coalesce(Subquery(published_posts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_category_posts_count, migrations.RunPython.noop),
+    ]
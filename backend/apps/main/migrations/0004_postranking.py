@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_category_posts_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='main.post')),
+            ],
+            options={
+                'verbose_name': 'Post Ranking',
+                'verbose_name_plural': 'Post Rankings',
+                'db_table': 'post_rankings',
+                'ordering': ['scope', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'rank'), name='unique_post_ranking_scope_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:16
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+from django.db.models.functions import Concat, Left, Length
+from django.db.models.lookups import GreaterThan
+
+
+EXCERPT_LENGTH = 200
+
+
+def fill_post_excerpt(apps, schema_editor):
+    Post = apps.get_model('main', 'Post')
+
+    Post.objects.update(excerpt=Case(
+        When(
+            GreaterThan(Length('content'), EXCERPT_LENGTH),
+            then=Concat(Left('content', EXCERPT_LENGTH), Value('...')),
+        ),
+        default='content',
+        output_field=models.TextField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=203),
+        ),
+        migrations.RunPython(fill_post_excerpt, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('comments', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='main.post')),
+            ],
+            options={
+                'verbose_name': 'Post Daily Stats',
+                'verbose_name_plural': 'Post Daily Stats',
+                'db_table': 'post_daily_stats',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('post', 'date'), name='unique_post_daily_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_post_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='unique_viewers',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='viewers_sketch',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='postdailystats',
+            name='viewers_sketch',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
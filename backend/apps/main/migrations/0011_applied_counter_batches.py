@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_unique_viewers_sketches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppliedCounterBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Applied Counter Batch',
+                'verbose_name_plural': 'Applied Counter Batches',
+                'db_table': 'applied_counter_batches',
+            },
+        ),
+    ]
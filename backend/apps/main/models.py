@@ -1,6 +1,12 @@
+import re
+from collections import Counter
+
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.utils.text import slugify
+from django.db.models.functions import Cast, Substr, Upper
 from django.urls import reverse
 
 
@@ -11,6 +17,7 @@ class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
     description = models.TextField(blank=True)
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -18,6 +25,10 @@ class Category(models.Model):
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
         ordering = ['name']
+        indexes = [
+            # Триграммы по UPPER(name) - под icontains автодополнения
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='categories_name_trgm_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -36,13 +47,11 @@ class PostManager(models.Manager):
     
     def pinned_posts(self):
         '''Возврат закрепленных постов в порядке закрепления'''
+        from .pins import get_registry
+
         return self.filter(
-            pin_info__is_null=False,
-            pin_info__user__subscription__status='active',
-            pin_info__user__subscription__end_date__gt=models.functions.Now,
+            id__in=get_registry().active_post_ids(),
             status='published'
-        ).select_related(
-            'pin_info', 'pin_info__user', 'pin_info__user__subscription'
         ).order_by('pin_info__pinned_at')
     
     def regular_posts(self):
@@ -53,7 +62,7 @@ class PostManager(models.Manager):
         '''Добавляет информацию о подписке юзера'''
         return self.select_related(
             'author', 'author__subscription', 'category'
-        ).prefetch_related('pin_info')
+        )
 
 
 class Post(models.Model):
@@ -64,10 +73,23 @@ class Post(models.Model):
         ('published', 'Published'),
     ]
 
+    # Конфигурация полнотекстового поиска (и для индекса, и для запросов)
+    SEARCH_CONFIG = 'english'
+
+    # Анонс для списков и тяжёлые поля, которые спискам не нужны
+    EXCERPT_LENGTH = 200
+    LIST_DEFERRED_FIELDS = ('content', 'search_vector', 'viewers_sketch')
+
+    # Место под суффикс '-N' при совпадении слагов
+    SLUG_SUFFIX_RESERVE = 10
+
     title = models.CharField(max_length=200,)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
     content = models.TextField()
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH + 3, blank=True, editable=False)
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    # Уменьшенные копии изображения (см. images.generate_variants)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     category = models.ForeignKey(
         Category,
         on_delete=models.SET_NULL,
@@ -90,6 +112,22 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     views_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    # Уникальные зрители за всё время: оценка HyperLogLog и сам скетч Redis
+    # (до 12 КБ), в который при сбросе статистики вливаются дневные скетчи
+    unique_viewers = models.PositiveIntegerField(default=0, editable=False)
+    viewers_sketch = models.BinaryField(default=b'', editable=False)
+
+    # Поисковый вектор поддерживается самой БД: заголовок весомее текста
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+            SearchVector('content', weight='B', config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     objects = PostManager()
 
@@ -104,6 +142,8 @@ class Post(models.Model):
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['category', '-created_at']),
             models.Index(fields=['author', '-created_at']),
+            GinIndex(fields=['search_vector'], name='posts_search_vector_gin'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='posts_title_trgm_idx'),
         ]
     
     def __str__(self):
@@ -111,20 +151,90 @@ class Post(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            self.slug = self.allocate_slugs([self.title])[0]
+
+        # Анонс пересчитывается, только если текст загружен (не отложен)
+        if 'content' not in self.get_deferred_fields():
+            self.excerpt = self.make_excerpt(self.content)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
         super().save(*args, **kwargs)
+
+    @classmethod
+    def slug_base(cls, source):
+        '''Слаг заголовка (или желаемого слага) без суффикса -N'''
+        max_length = cls._meta.get_field('slug').max_length - cls.SLUG_SUFFIX_RESERVE
+        return slugify(source)[:max_length].strip('-') or 'post'
+
+    def slug_fits(self, source):
+        '''Текущий слаг уже выведен из source (base или base-N) - менять его не нужно'''
+        return re.fullmatch(rf'{re.escape(self.slug_base(source))}(-[0-9]+)?', self.slug) is not None
+
+    @classmethod
+    def allocate_slugs(cls, sources):
+        '''
+        Уникальные слаги для списка заголовков (или желаемых слагов).
+        Занятость проверяется для всего списка сразу: один запрос slug IN (...)
+        и, только для совпавших, один запрос максимальных суффиксов slug-N:
+        строки отбираются по префиксу (LIKE по индексу), максимум по каждому
+        base считается в БД - в Python приходит одна строка, сколько бы
+        слагов ни начиналось с того же префикса.
+        Совпадения внутри списка тоже учитываются.
+        '''
+        bases = [cls.slug_base(source) for source in sources]
+        if not bases:
+            return []
+
+        counts = Counter(bases)
+        taken = set(cls.objects.filter(slug__in=counts).values_list('slug', flat=True))
+        colliding = taken | {base for base, count in counts.items() if count > 1}
+
+        next_suffix = {}
+        if colliding:
+            colliding = sorted(colliding)
+            prefixes = models.Q()
+            suffixes = {}
+            for index, base in enumerate(colliding):
+                prefixes |= models.Q(slug__startswith=f'{base}-')
+                # Только base-<число>: base-foo-3 относится к другому base
+                suffixes[f'suffix_{index}'] = models.Max(
+                    Cast(Substr('slug', len(base) + 2), models.BigIntegerField()),
+                    filter=models.Q(slug__regex=rf'^{re.escape(base)}-[0-9]{{1,18}}$'),
+                )
+            maxima = cls.objects.filter(prefixes).aggregate(**suffixes)
+            for index, base in enumerate(colliding):
+                suffix = maxima[f'suffix_{index}']
+                if suffix is not None:
+                    next_suffix[base] = max(suffix + 1, 2)
+
+        slugs = []
+        used = set()
+        for base in bases:
+            slug = base
+            if base in taken or base in used:
+                suffix = next_suffix.get(base, 2)
+                while f'{base}-{suffix}' in used or f'{base}-{suffix}' in taken:
+                    suffix += 1
+                slug = f'{base}-{suffix}'
+                next_suffix[base] = suffix + 1
+            used.add(slug)
+            slugs.append(slug)
+        return slugs
+
+    @classmethod
+    def make_excerpt(cls, content):
+        '''Анонс: первые EXCERPT_LENGTH символов текста'''
+        if len(content) > cls.EXCERPT_LENGTH:
+            return content[:cls.EXCERPT_LENGTH] + '...'
+        return content
     
     def get_absolute_url(self):
         return reverse("post-detail", kwargs={"slug": self.slug})
     
-    @property
-    def comments_count(self):
-        '''Кол-во комментарий к посту'''
-        return self.comments.filter(is_active=True).count()
-    
     @property
     def is_pinned(self):
-        return hasattr(self, 'pin_info') and self.pin_info is not None
+        return self.get_pinned_info()['is_pinned']
 
     @property
     def can_be_pinned_by_user(self):
@@ -135,14 +245,15 @@ class Post(models.Model):
             return False
         return True
     
-    @property
-    def can_be_pinned_by(self, user):
+    def can_be_pinned_by(self, user, registry=None):
         '''Может ли юзер закрепить этот пост'''
+        from .pins import get_registry
+
         if not user or not user.is_authenticated:
             return False
         
         # Пост должен принадлежать пользователю
-        if self.author != user:
+        if self.author_id != user.pk:
             return False
         
         # Пост опублткован
@@ -150,27 +261,102 @@ class Post(models.Model):
             return False
         
         # Должна быть подписка
-        if not hasattr(user, 'subscription') or not user.subscription.is_active:
-            return False
-        return True
+        registry = registry or get_registry()
+        return registry.has_active_subscription(user.pk)
     
-    def increment_views(self):
-        '''Увел. счётчик просмотров'''
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+    def increment_views(self, viewer=None):
+        '''
+        Увел. счётчик просмотров через буфер.
+        В БД просмотр попадёт при следующем сбросе буфера.
+        viewer - идентификатор зрителя для дневной статистики уникальных.
+        '''
+        from .counters import PostViewBuffer
+
+        self.views_count += PostViewBuffer.record(self.pk, viewer)
     
 
-    def get_pinned_info(self):
-        '''Возварт инфы о закреплении поста'''
-
-        if self.is_pinned:
-            return {
-                'is_pinned': True,
-                'pinned_at': self.pin_info.pinned_at,
-                'pinned_by': {
-                    'id': self.pin_info.user.id,
-                    'username': self.pin_info.user.username,
-                    'has_active_subscription': self.pin_info.user.subscription.is_active,
-                }
-            }
-        return {'is_pinned': False}
\ No newline at end of file
+    def get_pinned_info(self, registry=None):
+        '''Возварт инфы о закреплении поста (по реестру закреплений, без запросов)'''
+        from .pins import get_registry
+
+        return (registry or get_registry()).pinned_info(self.pk)
+
+
+class PostRanking(models.Model):
+    '''Предрасчитанный топ "горячих" постов для области: глобально или категория'''
+
+    GLOBAL_SCOPE = 'global'
+
+    scope = models.CharField(max_length=50)
+    rank = models.PositiveIntegerField()
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='rankings'
+    )
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'post_rankings'
+        verbose_name = 'Post Ranking'
+        verbose_name_plural = 'Post Rankings'
+        ordering = ['scope', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'rank'], name='unique_post_ranking_scope_rank'),
+        ]
+
+    def __str__(self):
+        return f'{self.scope} #{self.rank}: {self.post_id}'
+
+    @staticmethod
+    def category_scope(category_id):
+        return f'category:{category_id}'
+
+
+class PostDailyStats(models.Model):
+    '''Дневная статистика поста: итоги за день из буфера в Redis'''
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_viewers = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    # Скетч HyperLogLog зрителей за день: уникальных за период
+    # считаем объединением скетчей, а не суммой
+    viewers_sketch = models.BinaryField(default=b'', editable=False)
+
+    class Meta:
+        db_table = 'post_daily_stats'
+        verbose_name = 'Post Daily Stats'
+        verbose_name_plural = 'Post Daily Stats'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'date'], name='unique_post_daily_stats'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} @ {self.date}: {self.views}'
+
+
+class AppliedCounterBatch(models.Model):
+    '''
+    Пакет буфера счётчиков, уже применённый к БД.
+    Отметка пишется в той же транзакции, что и приращения, поэтому пакет,
+    оставшийся в Redis после падения между коммитом и удалением, не применяется дважды.
+    '''
+
+    key = models.CharField(max_length=100, unique=True)
+    applied_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'applied_counter_batches'
+        verbose_name = 'Applied Counter Batch'
+        verbose_name_plural = 'Applied Counter Batches'
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,110 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .feed import PinnedFirstFeed, active_pinned_post_ids, decode_position, encode_position
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    '''
+    Keyset-пагинация по (-created_at, -id).
+    Не считает COUNT(*) и не использует OFFSET, поэтому
+    время ответа не зависит от глубины прокрутки.
+    '''
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class SearchRankCursorPagination(CursorPagination):
+    '''Курсорная пагинация результатов поиска по убыванию релевантности'''
+    ordering = ('-rank', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class OptInCursorPagination(BasePagination):
+    '''
+    Постраничная пагинация по умолчанию, курсорная - по запросу клиента:
+    ?pagination=cursor (или наличие ?cursor=...).
+    '''
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    page_number_class = PageNumberPagination
+    cursor_class = CreatedAtCursorPagination
+
+    def __init__(self):
+        self.paginator = self.page_number_class()
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode or
+            self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = self.cursor_class()
+        else:
+            self.paginator = self.page_number_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_number_class().get_schema_operation_parameters(view) +
+            self.cursor_class().get_schema_operation_parameters(view)
+        )
+
+
+class PinnedFirstCursorPagination(CreatedAtCursorPagination):
+    '''
+    Курсорная пагинация ленты "закрепленные сверху".
+    Закрепленные посты идут первыми, затем обычные по (-created_at, -id).
+    '''
+
+    def paginate_queryset(self, queryset, request, view=None, pinned_ids=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        if pinned_ids is None:
+            pinned_ids = active_pinned_post_ids()
+
+        try:
+            position = decode_position(request.query_params.get(self.cursor_query_param))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        feed = PinnedFirstFeed(queryset, pinned_ids)
+        self.pinned_count = len(feed.pinned_ids)
+        self.page, self.next_position = feed.get_page(position, self.page_size)
+        return self.page
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encode_position(self.next_position)
+        )
+
+    def get_previous_link(self):
+        return None
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+            'pinned_posts_count': self.pinned_count,
+        })
@@ -0,0 +1,96 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.subscribe.models import PinnedPost, Subscription
+from .response_cache import tag_versions, PINS_TAG, POSTS_TAG
+
+REGISTRY_KEY = 'pins:registry'
+
+Pin = namedtuple('Pin', 'post_id user_id username pinned_at post_status category_id')
+
+
+class PinsRegistry:
+    '''
+    Все закрепления и активные подписки в памяти.
+    Закреплений не больше одного на подписчика, поэтому реестр мал,
+    а закрепление любого числа постов определяется без запросов.
+    Истечение подписки проверяется по end_date в момент чтения.
+    '''
+
+    def __init__(self, pins, subscriptions):
+        self.pins = pins  # {post_id: Pin} в порядке закрепления
+        self.subscriptions = subscriptions  # {user_id: end_date}
+
+    def get(self, post_id):
+        return self.pins.get(post_id)
+
+    def has_active_subscription(self, user_id, now=None):
+        end_date = self.subscriptions.get(user_id)
+        return end_date is not None and end_date > (now or timezone.now())
+
+    def active_post_ids(self, category_id=None):
+        '''ID опубликованных постов, закрепленных юзерами с активной подпиской'''
+        now = timezone.now()
+        return [
+            pin.post_id for pin in self.pins.values()
+            if pin.post_status == 'published'
+            and (category_id is None or pin.category_id == category_id)
+            and self.has_active_subscription(pin.user_id, now)
+        ]
+
+    def pinned_info(self, post_id):
+        '''То же, что Post.get_pinned_info()'''
+        pin = self.pins.get(post_id)
+        if pin is None:
+            return {'is_pinned': False}
+        return {
+            'is_pinned': True,
+            'pinned_at': pin.pinned_at,
+            'pinned_by': {
+                'id': pin.user_id,
+                'username': pin.username,
+                'has_active_subscription': self.has_active_subscription(pin.user_id),
+            }
+        }
+
+
+def build_registry():
+    pins = PinnedPost.objects.order_by('pinned_at', 'id').values_list(
+        'post_id', 'user_id', 'user__username', 'pinned_at', 'post__status', 'post__category_id'
+    )
+    subscriptions = Subscription.objects.filter(
+        status='active', end_date__gt=timezone.now()
+    ).order_by().values_list('user_id', 'end_date')
+    return PinsRegistry({row[0]: Pin(*row) for row in pins}, dict(subscriptions))
+
+
+# Последний реестр процесса: (версия, реестр)
+_local = None
+
+
+def get_registry():
+    '''
+    Текущий реестр закреплений.
+    Версия - версии тегов кэша ответов: pins меняется при изменении
+    закреплений и подписок, posts - при смене статуса и категории постов.
+    Пока версия та же, реестр берётся из памяти процесса без распаковки.
+    '''
+    global _local
+
+    versions = tag_versions([PINS_TAG, POSTS_TAG])
+    version = f'{versions[PINS_TAG]}:{versions[POSTS_TAG]}'
+    local = _local
+    if local is not None and local[0] == version:
+        return local[1]
+
+    key = f'{REGISTRY_KEY}:{version}'
+    registry = cache.get(key)
+    if registry is None:
+        registry = build_registry()
+        cache.set(key, registry, settings.PINS_REGISTRY_TTL)
+
+    _local = (version, registry)
+    return registry
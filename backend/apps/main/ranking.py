@@ -0,0 +1,99 @@
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .counters import PostViewBuffer
+from .models import Post, PostRanking
+from .response_cache import invalidate_tags, RANKINGS_TAG
+
+
+class HotRanking:
+    '''
+    Расчёт "горячих" постов.
+    score = (просмотры + COMMENT_WEIGHT * комментарии + 1) / (возраст в часах + 2) ^ GRAVITY,
+    где просмотры и комментарии берутся только за последнее окно.
+    '''
+
+    COMMENT_WEIGHT = 5
+    GRAVITY = 1.5
+    CANDIDATES_CHUNK = 5000
+
+    def __init__(self, window_hours=None, top_k=None):
+        self.window_hours = window_hours or settings.HOT_RANKING_WINDOW_HOURS
+        self.top_k = top_k or settings.HOT_RANKING_TOP_K
+        self.now = timezone.now()
+        self.since = self.now - timedelta(hours=self.window_hours)
+
+    def windowed_comments(self):
+        from apps.comments.models import Comment
+
+        rows = Comment.objects.filter(
+            created_at__gte=self.since, is_active=True
+        ).order_by().values('post').annotate(total=Count('pk'))
+        return {row['post']: row['total'] for row in rows}
+
+    def candidates(self, active_ids):
+        '''Опубликованные посты с активностью за окно или созданные в окне'''
+        published = Post.objects.filter(status='published').order_by()
+        fields = ('id', 'category_id', 'created_at')
+
+        yield from published.filter(created_at__gte=self.since).values_list(*fields)
+
+        active_ids = sorted(active_ids)
+        for start in range(0, len(active_ids), self.CANDIDATES_CHUNK):
+            chunk = active_ids[start:start + self.CANDIDATES_CHUNK]
+            yield from published.filter(
+                id__in=chunk, created_at__lt=self.since
+            ).values_list(*fields)
+
+    def score(self, views, comments, created_at):
+        age_hours = max((self.now - created_at).total_seconds() / 3600, 0)
+        return (views + self.COMMENT_WEIGHT * comments + 1) / (age_hours + 2) ** self.GRAVITY
+
+    def compute(self):
+        '''Возврат {scope: [(score, post_id), ...]} - топ-K по убыванию'''
+        views = PostViewBuffer.windowed_views(self.window_hours)
+        comments = self.windowed_comments()
+
+        scored = defaultdict(list)
+        for post_id, category_id, created_at in self.candidates(set(views) | set(comments)):
+            entry = (self.score(views.get(post_id, 0), comments.get(post_id, 0), created_at), post_id)
+            scored[PostRanking.GLOBAL_SCOPE].append(entry)
+            if category_id is not None:
+                scored[PostRanking.category_scope(category_id)].append(entry)
+
+        return {
+            scope: heapq.nlargest(self.top_k, entries)
+            for scope, entries in scored.items()
+        }
+
+    def rebuild(self):
+        '''Пересчёт и атомарная замена таблицы рейтингов'''
+        rankings = [
+            PostRanking(
+                scope=scope, rank=rank, post_id=post_id,
+                score=score, computed_at=self.now,
+            )
+            for scope, top in self.compute().items()
+            for rank, (score, post_id) in enumerate(top, start=1)
+        ]
+
+        with transaction.atomic():
+            PostRanking.objects.all().delete()
+            PostRanking.objects.bulk_create(rankings, batch_size=1000)
+            invalidate_tags(RANKINGS_TAG)
+        return len(rankings)
+
+
+def ranked_posts(queryset, scope, limit):
+    '''Топ постов области из таблицы рейтингов: O(limit) по индексу (scope, rank)'''
+    return queryset.filter(rankings__scope=scope).order_by('rankings__rank')[:limit]
+
+
+def has_rankings(scope):
+    return PostRanking.objects.filter(scope=scope).exists()
@@ -0,0 +1,213 @@
+import functools
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Теги данных, от которых зависят закэшированные ответы
+POSTS_TAG = 'posts'
+PINS_TAG = 'pins'
+RANKINGS_TAG = 'rankings'
+
+KEY_PREFIX = 'response_cache'
+CACHE_HEADER = 'X-Cache'
+
+
+def _tag_key(tag):
+    return f'{KEY_PREFIX}:tag:{tag}'
+
+
+def _stats_key(endpoint, outcome):
+    return f'{KEY_PREFIX}:stats:{endpoint}:{outcome}'
+
+
+def tag_versions(tags):
+    '''
+    Текущие версии тегов.
+    Версия - метка времени последней инвалидации; отсутствующий тег
+    получает новую версию, поэтому вытесненный из кэша тег не может
+    "воскресить" устаревшие ответы.
+    '''
+    keys = {tag: _tag_key(tag) for tag in tags}
+    stored = cache.get_many(keys.values())
+
+    versions = {}
+    for tag, key in keys.items():
+        if key not in stored:
+            cache.add(key, time.time_ns(), None)
+            stored[key] = cache.get(key)
+        versions[tag] = stored[key]
+    return versions
+
+
+def invalidate_tags(*tags):
+    '''Инвалидация ответов, зависящих от тегов, после фиксации транзакции'''
+    def bump():
+        version = time.time_ns()
+        cache.set_many({_tag_key(tag): version for tag in tags}, None)
+
+    transaction.on_commit(bump)
+
+
+def _count(endpoint, outcome):
+    key = _stats_key(endpoint, outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен между add и incr
+        cache.set(key, 1, None)
+
+
+def get_stats(endpoints=None):
+    '''Счётчики попаданий/промахов: {endpoint: {'hit': n, 'miss': n}}'''
+    endpoints = endpoints or settings.RESPONSE_CACHE_TTLS.keys()
+    keys = {
+        (endpoint, outcome): _stats_key(endpoint, outcome)
+        for endpoint in endpoints
+        for outcome in ('hit', 'miss')
+    }
+    stored = cache.get_many(keys.values())
+    stats = {}
+    for (endpoint, outcome), key in keys.items():
+        stats.setdefault(endpoint, {})[outcome] = stored.get(key, 0)
+    return stats
+
+
+def reset_stats(endpoints=None):
+    endpoints = endpoints or settings.RESPONSE_CACHE_TTLS.keys()
+    cache.delete_many([
+        _stats_key(endpoint, outcome)
+        for endpoint in endpoints
+        for outcome in ('hit', 'miss')
+    ])
+
+
+def _versioned_key(endpoint, parts, tags):
+    versions = tag_versions(tags)
+    fingerprint = '|'.join(
+        [str(part) for part in parts] +
+        [f'{tag}={versions[tag]}' for tag in sorted(versions)]
+    )
+    return f'{KEY_PREFIX}:{endpoint}:{hashlib.md5(fingerprint.encode()).hexdigest()}'
+
+
+def _cache_key(endpoint, request, tags):
+    return _versioned_key(endpoint, [request.build_absolute_uri()], tags)
+
+
+def cached_fragment(endpoint, parts, tags, build):
+    '''
+    Общая для всех пользователей часть ответа (например, страница ленты),
+    из которой ответ собирается вместе с персональными данными.
+    Ключ - эндпоинт, parts и версии тегов. Возврат (значение, попадание).
+    '''
+    ttl = settings.RESPONSE_CACHE_TTLS.get(endpoint)
+    if not ttl:
+        return build(), False
+
+    cache_key = _versioned_key(endpoint, parts, tags)
+    value = cache.get(cache_key)
+    if value is not None:
+        _count(endpoint, 'hit')
+        return value, True
+
+    _count(endpoint, 'miss')
+    value = build()
+    cache.set(cache_key, value, ttl)
+    return value, False
+
+
+def cached_response(endpoint, tags):
+    '''
+    Кэширование ответа анонимного GET-эндпоинта.
+    Ключ - эндпоинт, полный URL запроса (хост влияет на абсолютные
+    ссылки в ответе) и версии тегов: инвалидация тега делает все
+    зависящие от него ключи недостижимыми.
+    Время жизни - settings.RESPONSE_CACHE_TTLS[endpoint].
+    '''
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            ttl = settings.RESPONSE_CACHE_TTLS.get(endpoint)
+            if not ttl or request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+
+            cache_key = _cache_key(endpoint, request, tags)
+            data = cache.get(cache_key)
+            if data is not None:
+                _count(endpoint, 'hit')
+                return Response(data, headers={CACHE_HEADER: 'HIT'})
+
+            _count(endpoint, 'miss')
+            response = view(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(cache_key, response.data, ttl)
+            response[CACHE_HEADER] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def acached_response(endpoint, tags):
+    '''
+    cached_response для async-view (async_api_view): ключ и записи те же,
+    поэтому sync- и async-варианты эндпоинта делят кэш.
+    '''
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            ttl = settings.RESPONSE_CACHE_TTLS.get(endpoint)
+            if not ttl or request.method != 'GET' or request.user.is_authenticated:
+                return await view(request, *args, **kwargs)
+
+            cache_key = await sync_to_async(_cache_key)(endpoint, request, tags)
+            data = await cache.aget(cache_key)
+            if data is not None:
+                await sync_to_async(_count)(endpoint, 'hit')
+                return Response(data, headers={CACHE_HEADER: 'HIT'})
+
+            await sync_to_async(_count)(endpoint, 'miss')
+            response = await view(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                await cache.aset(cache_key, response.data, ttl)
+            response[CACHE_HEADER] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_content(endpoint, tags):
+    '''
+    То же для обычных Django-view (XML-ленты и т.п.): кэшируется готовое
+    тело ответа. Содержимое не зависит от пользователя, поэтому кэш общий.
+    '''
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            ttl = settings.RESPONSE_CACHE_TTLS.get(endpoint)
+            if not ttl or request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            cache_key = _cache_key(endpoint, request, tags)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                _count(endpoint, 'hit')
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type, headers={CACHE_HEADER: 'HIT'})
+
+            _count(endpoint, 'miss')
+            response = view(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(cache_key, (response.content, response['Content-Type']), ttl)
+            response[CACHE_HEADER] = 'MISS'
+            return response
+        return wrapper
+    return decorator
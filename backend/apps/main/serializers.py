@@ -1,73 +1,114 @@
 from rest_framework import serializers
+from django.utils.functional import cached_property
 from django.utils.text import slugify
+from .fieldsets import SparseFieldsetMixin
+from .export import EXPORT_OUTPUTS
+from .images import srcset
 from .models import Category, Post
+from .pins import get_registry
 
 
 class CategorySerializer(serializers.ModelSerializer):
     '''Сериализатор для категорий'''
-    posts_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'posts_count', 'created_at']
-        read_only_fields = ['slug', 'created_at']
-    
-    def get_posts_count(self, obj):
-        return obj.posts.filter(status='published').count()
+        read_only_fields = ['slug', 'posts_count', 'created_at']
     
     def create(self, validated_data,):
         validated_data['slug'] = slugify(validated_data['name'])
         return super().create(validated_data)
 
 
-class PostListSerializer(serializers.ModelSerializer):
-    '''Сериализатор для списка постов'''
+class PinnedInfoMixin:
+    '''Закрепление по реестру: реестр читается один раз на сериализацию'''
+
+    @cached_property
+    def pins_registry(self):
+        return get_registry()
+
+    def get_is_pinned(self, obj):
+        return self.pins_registry.get(obj.pk) is not None
+
+    def get_pinned_info(self, obj):
+        '''Возврат инфы о закреплении'''
+        return obj.get_pinned_info(self.pins_registry)
+
+
+class PostListSerializer(PinnedInfoMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    '''Сериализатор для списка постов: вместо текста - сохранённый анонс'''
+    content = serializers.CharField(source='excerpt', read_only=True)
     author = serializers.StringRelatedField()
     category = serializers.StringRelatedField()
     comments_count = serializers.ReadOnlyField()
-    is_pinned = serializers.ReadOnlyField()
+    is_pinned = serializers.SerializerMethodField()
     pinned_info = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
         fields = [
-            'id', 'title', 'slug', 'content', 'image', 'category',
+            'id', 'title', 'slug', 'content', 'image', 'image_srcset', 'category',
             'author', 'status', 'created_at', 'updated_at',
             'views_count', 'comments_count', 'is_pinned', 'pinned_info'
         ]
 
         read_only_fields = ['slug', 'author', 'views_count']
 
-        def get_pinned_info(self, obj):
-            '''Возврат инфы о закреплении'''
-            return obj.get_pinned_info()
+        sparse_columns = {
+            'image_srcset': ['image', 'image_variants'],
+        }
+        sparse_relations = {
+            'author': ['author'],
+            'category': ['category'],
+        }
+
+    def get_image_srcset(self, obj):
+        return srcset(obj.image, obj.image_variants, self.context.get('request'))
+
 
-        def to_representation(self, instance):
-            data = super().to_representation(instance)
+class PostSearchSerializer(PostListSerializer):
+    '''Сериализатор результата поиска: релевантность и фрагмент с подсветкой'''
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
 
-            if len(data['content']) >= 200:
-                data['content'] = data['content'][:200] + '...'
-            return data
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ['rank', 'headline']
 
 
-class PostDetailSerializer(serializers.ModelSerializer):
+class PostDetailSerializer(PinnedInfoMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     author_info = serializers.SerializerMethodField()
     category_info = serializers.SerializerMethodField()
     comments_count = serializers.ReadOnlyField()
-    is_pinned = serializers.ReadOnlyField()
+    is_pinned = serializers.SerializerMethodField()
     pinned_info = serializers.SerializerMethodField()
     can_pin = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
 
     class Meta:
         model = Post
         fields = [
-            'id', 'title', 'slug', 'content', 'image', 'category',
+            'id', 'title', 'slug', 'content', 'image', 'image_srcset', 'category',
             'category_info', 'author', 'author_info', 'status',
-            'created_at', 'updated_at', 'views_count', 'comments_count',
+            'created_at', 'updated_at', 'views_count', 'unique_viewers', 'comments_count',
             'is_pinned', 'pinned_info', 'can_pin'
         ]
-        read_only_fields = ['slug', 'author', 'views_count']
+        read_only_fields = ['slug', 'author', 'views_count', 'unique_viewers']
+
+        sparse_columns = {
+            'image_srcset': ['image', 'image_variants'],
+            'author_info': ['author'],
+            'category_info': ['category'],
+            'can_pin': ['author', 'status'],
+        }
+        sparse_relations = {
+            'author': ['author'],
+            'author_info': ['author'],
+            'category': ['category'],
+            'category_info': ['category'],
+        }
     
     def get_author_info(self, obj):
         author = obj.author
@@ -76,6 +117,7 @@ class PostDetailSerializer(serializers.ModelSerializer):
             'username': author.username,
             'first_name': author.first_name,
             'avatar': author.avatar.url if author.avatar else None,
+            'avatar_srcset': srcset(author.avatar, author.avatar_variants),
         }
     
     def get_category_info(self, obj):
@@ -86,8 +128,8 @@ class PostDetailSerializer(serializers.ModelSerializer):
                 'slug': obj.category.slug,
             }
     
-    def get_pinned_info(self, obj):
-        return obj.get_pinned_info()
+    def get_image_srcset(self, obj):
+        return srcset(obj.image, obj.image_variants, self.context.get('request'))
     
     def get_can_pin(self, obj):
         '''Проверка на возможность юзеру закрепить пост'''
@@ -95,7 +137,7 @@ class PostDetailSerializer(serializers.ModelSerializer):
 
         if not request or not request.user.is_authenticated:
             return False
-        return obj.can_be_pinned_by(request.user)
+        return obj.can_be_pinned_by(request.user, self.pins_registry)
 
 
 class PostCreateUpdateSerializer(serializers.ModelSerializer):
@@ -107,10 +149,32 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
-        validated_data['slug'] = slugify(validated_data['title'])
+        validated_data['slug'] = Post.allocate_slugs([validated_data['title']])[0]
         return super().create(validated_data)
     
     def update(self, instance, validated_data):
-        if 'title' in validated_data:
-            validated_data['slug'] = slugify(validated_data['title'])
-        return super().update(instance, validated_data)
\ No newline at end of file
+        # Правка регистра или пунктуации не меняет слаг: старые ссылки остаются рабочими
+        if 'title' in validated_data and not instance.slug_fits(validated_data['title']):
+            validated_data['slug'] = Post.allocate_slugs([validated_data['title']])[0]
+        return super().update(instance, validated_data)
+
+
+class ExportParamsSerializer(serializers.Serializer):
+    '''Параметры выгрузки: формат, сжатие и диапазон updated_at [from, to)'''
+
+    output = serializers.ChoiceField(choices=EXPORT_OUTPUTS, default='ndjson')
+    gzip = serializers.BooleanField(default=False)
+    updated_from = serializers.DateTimeField(required=False)
+    updated_to = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if 'updated_from' in attrs and 'updated_to' in attrs and attrs['updated_from'] >= attrs['updated_to']:
+            raise serializers.ValidationError('updated_from must be earlier than updated_to')
+        return attrs
+
+
+class PostStatsParamsSerializer(serializers.Serializer):
+    '''Параметры статистики автора: период в днях и (опционально) один пост'''
+
+    days = serializers.IntegerField(min_value=1, max_value=365, default=30)
+    post = serializers.IntegerField(required=False)
@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, pre_save, post_delete
+from django.dispatch import receiver
+from .models import Category, Post
+from .images import schedule_processing as schedule_image_processing
+from . import sitemaps
+from .homepage import schedule_rebuild as schedule_homepage_rebuild
+from .response_cache import invalidate_tags, PINS_TAG, POSTS_TAG
+
+
+def shift_category_posts_count(category_id, delta):
+    '''Сдвиг счётчика опубликованных постов категории'''
+    if category_id is not None and delta:
+        Category.objects.filter(pk=category_id).update(
+            posts_count=Greatest(F('posts_count') + delta, 0)
+        )
+
+
+def _published_category(status, category_id):
+    '''Категория, в которой пост учитывается, или None'''
+    return category_id if status == 'published' else None
+
+
+@receiver(pre_save, sender=Post)
+def post_pre_save(sender, instance, **kwargs):
+    '''Запоминает прежние статус, категорию и изображение поста'''
+    if not instance._state.adding:
+        previous = (
+            Post.objects.filter(pk=instance.pk)
+            .values('status', 'category_id', 'image').first()
+        )
+        if previous:
+            instance._previous_category = _published_category(
+                previous['status'], previous['category_id']
+            )
+            instance._previous_image = previous['image'] or ''
+
+
+@receiver(post_save, sender=Post)
+def post_post_save(sender, instance, created, **kwargs):
+    '''Обновляет статистику категорий при публикации и смене категории'''
+    current = _published_category(instance.status, instance.category_id)
+    previous = None if created else getattr(instance, '_previous_category', None)
+
+    if current != previous:
+        shift_category_posts_count(previous, -1)
+        shift_category_posts_count(current, 1)
+
+
+@receiver(post_save, sender=Post)
+def post_image_changed(sender, instance, created, **kwargs):
+    '''Новое изображение - фоновая генерация производных'''
+    image = instance.image.name or ''
+    previous = '' if created else getattr(instance, '_previous_image', image)
+
+    if image != previous:
+        schedule_image_processing('post_image', instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_post_delete(sender, instance, **kwargs):
+    '''Удаление опубликованного поста уменьшает счётчик категории'''
+    shift_category_posts_count(
+        _published_category(instance.status, instance.category_id), -1
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_sitemap_changed(sender, instance, **kwargs):
+    '''Пересборка файла карты сайта с этим постом'''
+    post_id = instance.pk
+
+    def mark():
+        sitemaps.mark_posts_changed([post_id])
+        sitemaps.schedule_update()
+
+    transaction.on_commit(mark)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_sitemap_changed(sender, **kwargs):
+    transaction.on_commit(sitemaps.schedule_update)
+
+
+# Инвалидация кэша ответов: модели других приложений - через ленивые ссылки
+_POSTS_SENDERS = [Post, Category, 'comments.Comment']
+_PINS_SENDERS = ['subscribe.PinnedPost', 'subscribe.Subscription']
+
+
+def invalidate_posts_cache(sender, **kwargs):
+    invalidate_tags(POSTS_TAG)
+    transaction.on_commit(schedule_homepage_rebuild)
+
+
+def invalidate_pins_cache(sender, **kwargs):
+    invalidate_tags(PINS_TAG)
+    transaction.on_commit(schedule_homepage_rebuild)
+
+
+for _sender in _POSTS_SENDERS:
+    post_save.connect(invalidate_posts_cache, sender=_sender, dispatch_uid=f'response_cache_posts_save:{_sender}')
+    post_delete.connect(invalidate_posts_cache, sender=_sender, dispatch_uid=f'response_cache_posts_delete:{_sender}')
+
+for _sender in _PINS_SENDERS:
+    post_save.connect(invalidate_pins_cache, sender=_sender, dispatch_uid=f'response_cache_pins_save:{_sender}')
+    post_delete.connect(invalidate_pins_cache, sender=_sender, dispatch_uid=f'response_cache_pins_delete:{_sender}')
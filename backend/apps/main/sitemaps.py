@@ -0,0 +1,177 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.template.loader import render_to_string
+
+from .models import Category, Post
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = 'sitemap:index'
+UPDATE_SCHEDULED_KEY = 'sitemap:update-scheduled'
+CATEGORIES_SECTION = 'categories'
+POSTS_SECTION_PREFIX = 'posts-'
+
+
+def _section_key(section):
+    return f'sitemap:section:{section}'
+
+
+def _dirty_key(chunk):
+    return f'sitemap:dirty:{chunk}'
+
+
+def post_url(slug):
+    return settings.PUBLIC_POST_URL.format(slug=slug)
+
+
+def category_url(slug):
+    return settings.PUBLIC_CATEGORY_URL.format(slug=slug)
+
+
+def post_chunk(post_id):
+    '''
+    Номер файла карты для поста.
+    Файлы нарезаны по диапазонам id, поэтому изменение поста
+    затрагивает ровно один файл.
+    '''
+    return post_id // settings.SITEMAP_CHUNK_SIZE
+
+
+def _render(urls):
+    return render_to_string('sitemap.xml', {'urlset': urls}).encode()
+
+
+def build_posts_section(chunk):
+    '''Файл карты с опубликованными постами диапазона id; (xml, lastmod) или None'''
+    size = settings.SITEMAP_CHUNK_SIZE
+    rows = Post.objects.filter(
+        status='published', id__gte=chunk * size, id__lt=(chunk + 1) * size
+    ).order_by('id').values_list('slug', 'updated_at')
+
+    urls = [{'location': post_url(slug), 'lastmod': updated_at} for slug, updated_at in rows]
+    if not urls:
+        return None
+    return _render(urls), max(url['lastmod'] for url in urls)
+
+
+def build_categories_section():
+    '''Категории; дата изменения категории - последнее изменение её постов'''
+    rows = Category.objects.annotate(
+        lastmod=Max('posts__updated_at')
+    ).order_by('name').values_list('slug', 'lastmod', 'created_at')
+
+    urls = [
+        {'location': category_url(slug), 'lastmod': lastmod or created_at}
+        for slug, lastmod, created_at in rows
+    ]
+    if not urls:
+        return None
+    return _render(urls), max(url['lastmod'] for url in urls)
+
+
+def build_section(section):
+    if section == CATEGORIES_SECTION:
+        return build_categories_section()
+    return build_posts_section(int(section[len(POSTS_SECTION_PREFIX):]))
+
+
+def _store(index, section, built):
+    if built is None:
+        index.pop(section, None)
+        cache.delete(_section_key(section))
+    else:
+        xml, lastmod = built
+        cache.set(_section_key(section), xml, None)
+        index[section] = lastmod
+
+
+def update_sitemaps(full=False):
+    '''
+    Инкрементальная пересборка карты сайта в кэше.
+    Пересобираются только помеченные изменёнными и отсутствующие файлы
+    постов (full=True - все), категории - всегда (файл один и небольшой).
+    Индекс хранится как {раздел: lastmod} и рендерится при отдаче.
+    '''
+    max_id = Post.objects.aggregate(max_id=Max('id'))['max_id']
+    chunks = range(post_chunk(max_id) + 1) if max_id is not None else range(0)
+
+    index = {} if full else (cache.get(INDEX_KEY) or {})
+    dirty = cache.get_many([_dirty_key(chunk) for chunk in chunks])
+    stale = [
+        chunk for chunk in chunks
+        if full or _dirty_key(chunk) in dirty or f'{POSTS_SECTION_PREFIX}{chunk}' not in index
+    ]
+    # Снимаем пометки до сборки: изменения во время сборки пометят файл заново
+    cache.delete_many([_dirty_key(chunk) for chunk in stale])
+
+    sections = {f'{POSTS_SECTION_PREFIX}{chunk}': build_posts_section(chunk) for chunk in stale}
+    sections[CATEGORIES_SECTION] = build_categories_section()
+
+    for section, built in sections.items():
+        _store(index, section, built)
+
+    # Файлы за пределами текущего max(id) (удалённые посты)
+    for section in [name for name in index if name.startswith(POSTS_SECTION_PREFIX)]:
+        if int(section[len(POSTS_SECTION_PREFIX):]) not in chunks:
+            index.pop(section)
+            cache.delete(_section_key(section))
+
+    cache.set(INDEX_KEY, index, None)
+    return {'sections': len(index), 'rebuilt': len(sections)}
+
+
+def get_index():
+    '''{раздел: lastmod}; при холодном кэше карта собирается на месте'''
+    index = cache.get(INDEX_KEY)
+    if index is None:
+        update_sitemaps()
+        index = cache.get(INDEX_KEY, {})
+    return index
+
+
+def get_section(section):
+    '''XML файла карты или None, если такого раздела нет'''
+    xml = cache.get(_section_key(section))
+    if xml is None:
+        index = get_index()
+        if section in index:
+            # Файл вытеснен из кэша - собираем только его
+            built = build_section(section)
+            _store(index, section, built)
+            cache.set(INDEX_KEY, index, None)
+            xml = built[0] if built else None
+    return xml
+
+
+def render_index(sections):
+    '''sections - [(адрес файла, lastmod)]'''
+    return render_to_string('sitemap_index.xml', {
+        'sitemaps': [{'location': location, 'last_mod': lastmod} for location, lastmod in sections],
+    }).encode()
+
+
+def mark_posts_changed(post_ids):
+    '''Пометка файлов карты с этими постами для пересборки'''
+    cache.set_many({_dirty_key(post_chunk(post_id)): 1 for post_id in post_ids}, None)
+
+
+def schedule_update():
+    '''
+    Отложенная пересборка после изменений постов и категорий.
+    Серия изменений за SITEMAP_UPDATE_DELAY сек. даёт одну пересборку.
+    '''
+    from .tasks import update_sitemaps as update_sitemaps_task
+
+    delay = settings.SITEMAP_UPDATE_DELAY
+    if not cache.add(UPDATE_SCHEDULED_KEY, 1, delay):
+        return
+
+    try:
+        update_sitemaps_task.apply_async(countdown=delay)
+    except Exception as e:
+        # Брокер недоступен - карта обновится по расписанию
+        cache.delete(UPDATE_SCHEDULED_KEY)
+        logger.warning(f'Failed to schedule sitemap update: {e}')
@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from . import sitemaps
+from .models import Category, Post
+from .response_cache import cached_content, POSTS_TAG
+
+FEED_LIMIT = 30
+
+
+def feed_posts(**filters):
+    '''Последние опубликованные посты для ленты (без полного текста)'''
+    return (
+        Post.objects.published()
+        .filter(**filters)
+        .select_related('author', 'category')
+        .defer(*Post.LIST_DEFERRED_FIELDS)
+        .order_by('-created_at')[:FEED_LIMIT]
+    )
+
+
+class LatestPostsFeed(Feed):
+    '''RSS последних опубликованных постов'''
+
+    title = 'Latest posts'
+    description = 'Latest published posts'
+
+    def link(self):
+        return settings.SITE_URL
+
+    def items(self):
+        return feed_posts()
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return sitemaps.post_url(item.slug)
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return [item.category.name] if item.category else []
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class CategoryPostsFeed(LatestPostsFeed):
+    '''RSS последних постов категории'''
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Category, slug=slug)
+
+    def title(self, obj):
+        return f'Latest posts: {obj.name}'
+
+    def description(self, obj):
+        return obj.description or f'Latest published posts in {obj.name}'
+
+    def link(self, obj):
+        return sitemaps.category_url(obj.slug)
+
+    def items(self, obj):
+        return feed_posts(category=obj)
+
+
+class CategoryPostsAtomFeed(CategoryPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def feed_view(feed_class):
+    '''Лента из кэша ответов; без транзакции запроса - при попадании БД не нужна'''
+    return transaction.non_atomic_requests(cached_content('feeds', [POSTS_TAG])(feed_class()))
+
+
+@transaction.non_atomic_requests
+def sitemap_index(request):
+    '''Индекс карты сайта: из кэша, без обращения к БД'''
+    sections = [
+        (request.build_absolute_uri(reverse('sitemap-section', kwargs={'section': section})), lastmod)
+        for section, lastmod in sorted(sitemaps.get_index().items())
+    ]
+    return HttpResponse(sitemaps.render_index(sections), content_type='application/xml')
+
+
+@transaction.non_atomic_requests
+def sitemap_section(request, section):
+    '''Файл карты сайта из кэша'''
+    xml = sitemaps.get_section(section)
+    if xml is None:
+        raise Http404
+    return HttpResponse(xml, content_type='application/xml')
@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import syndication
+
+
+urlpatterns = [
+    # Карта сайта
+    path('sitemap.xml', syndication.sitemap_index, name='sitemap-index'),
+    path('sitemap-<str:section>.xml', syndication.sitemap_section, name='sitemap-section'),
+
+    # RSS/Atom
+    path('feeds/rss/', syndication.feed_view(syndication.LatestPostsFeed), name='feed-rss'),
+    path('feeds/atom/', syndication.feed_view(syndication.LatestPostsAtomFeed), name='feed-atom'),
+    path('feeds/categories/<slug:slug>/rss/', syndication.feed_view(syndication.CategoryPostsFeed), name='category-feed-rss'),
+    path('feeds/categories/<slug:slug>/atom/', syndication.feed_view(syndication.CategoryPostsAtomFeed), name='category-feed-atom'),
+]
@@ -0,0 +1,60 @@
+import logging
+
+from celery import shared_task
+from celery.signals import worker_shutting_down
+
+from . import homepage, images, sitemaps
+from .counters import PostDailyStatsBuffer, PostViewBuffer
+from .ranking import HotRanking
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_post_views():
+    '''Периодический сброс буфера просмотров в БД'''
+    return {'flushed_views': PostViewBuffer.flush()}
+
+
+@shared_task
+def flush_post_daily_stats():
+    '''Перенос дневной статистики постов из Redis в PostDailyStats'''
+    return {'rows': PostDailyStatsBuffer.flush()}
+
+
+@shared_task
+def compute_hot_rankings():
+    '''Периодический пересчёт топа "горячих" постов'''
+    rankings = HotRanking().rebuild()
+    # Популярные секции главной берутся из рейтинга
+    homepage.rebuild_bundle()
+    return {'rankings': rankings}
+
+
+@shared_task
+def rebuild_homepage_bundle():
+    '''Пересборка бандла главной страницы в кэше'''
+    bundle = homepage.rebuild_bundle()
+    return {'recent_posts': len(bundle['recent'])}
+
+
+@shared_task
+def update_sitemaps(full=False):
+    '''Пересборка изменённых файлов карты сайта'''
+    return sitemaps.update_sitemaps(full=full)
+
+
+@shared_task(autoretry_for=(OSError,), retry_backoff=True, max_retries=3)
+def process_image_variants(kind, pk):
+    '''Генерация уменьшенных копий изображения (WebP/JPEG)'''
+    data = images.process_image(kind, pk)
+    return {'variants': len(data['variants']) if data else 0}
+
+
+@worker_shutting_down.connect
+def drain_post_views(**kwargs):
+    '''Сброс буфера просмотров при остановке воркера'''
+    try:
+        PostViewBuffer.flush()
+    except Exception as e:
+        logger.error(f'Failed to drain post views buffer: {e}')
@@ -1,3 +1,307 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.accounts.models import User
+from apps.comments.models import Comment
+from apps.payment.models import Payment
+from apps.subscribe.models import PinnedPost, Subscription, SubscriptionPlan
+from config.middleware import PIN_COOKIE, ReplicaRoutingMiddleware
+from .counters import PostViewBuffer
+from .feed import DraftsOverlayFeed, decode_overlay_position, encode_position, keyset_position
+from .models import Category, Post, PostRanking
+from .response_cache import PINS_TAG, invalidate_tags
+from .serializers import PostListSerializer
+
+
+@override_settings(
+    RESPONSE_CACHE_TTLS={},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class FastSerializersParityTest(TestCase):
+    '''Быстрый путь сериализации отдаёт тот же JSON, что и сериализаторы DRF'''
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        plan = SubscriptionPlan.objects.create(name='Pro', price=10, stripe_price_id='price_pro')
+
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author', password='x',
+            first_name='Ann', last_name='Lee', avatar='avatars/ann.png',
+            avatar_variants={
+                'source': 'avatars/ann.png', 'width': 200, 'height': 200,
+                'variants': [
+                    {'name': 'avatars/variants/ann/48w.webp', 'format': 'webp', 'width': 48, 'height': 48},
+                    {'name': 'avatars/variants/ann/48w.jpg', 'format': 'jpg', 'width': 48, 'height': 48},
+                ],
+            },
+        )
+        cls.reader = User.objects.create_user(email='reader@example.com', username='reader', password='x')
+        lapsed = User.objects.create_user(email='lapsed@example.com', username='lapsed', password='x')
+
+        Subscription.objects.bulk_create([
+            Subscription(user=cls.author, plan=plan, status='active', start_date=now, end_date=now + timedelta(days=30)),
+            Subscription(user=lapsed, plan=plan, status='expired', start_date=now - timedelta(days=60), end_date=now - timedelta(days=30)),
+        ])
+
+        category = Category.objects.create(name='Tech')
+        cls.posts = [
+            Post.objects.create(title='Short', content='Short body', author=cls.author, category=category),
+            Post.objects.create(title='Long', content='x' * 500, author=cls.author),
+            Post.objects.create(
+                title='With image', content='Body', author=lapsed, category=category,
+                image='posts/cover.png',
+                image_variants={
+                    'source': 'posts/cover.png', 'width': 1000, 'height': 500,
+                    'variants': [
+                        {'name': 'posts/variants/cover/320w.webp', 'format': 'webp', 'width': 320, 'height': 160},
+                        {'name': 'posts/variants/cover/320w.jpg', 'format': 'jpg', 'width': 320, 'height': 160},
+                    ],
+                },
+            ),
+            Post.objects.create(title='Stale image', content='Body', author=cls.reader, image='posts/new.png',
+                                image_variants={'source': 'posts/old.png', 'width': 1, 'height': 1, 'variants': []}),
+            Post.objects.create(title='Draft', content='Body', author=cls.author, status='draft'),
+        ]
+        PinnedPost.objects.bulk_create([
+            PinnedPost(user=cls.author, post=cls.posts[0]),
+            PinnedPost(user=lapsed, post=cls.posts[2]),
+        ])
+
+        top = Comment.objects.create(post=cls.posts[0], author=cls.reader, content='First')
+        Comment.objects.create(post=cls.posts[0], author=cls.author, content='Reply', parent=top)
+        Comment.objects.create(post=cls.posts[0], author=cls.reader, content='Hidden', parent=top, is_active=False)
+        Comment.objects.create(post=cls.posts[0], author=cls.author, content='Second')
+
+    def assertSameResponse(self, url):
+        with self.settings(FAST_SERIALIZERS_ENABLED=False):
+            expected = self.client.get(url)
+        with self.settings(FAST_SERIALIZERS_ENABLED=True):
+            actual = self.client.get(url)
+
+        self.assertEqual(expected.status_code, 200)
+        self.assertEqual(actual.status_code, 200)
+        self.assertEqual(actual.content, expected.content)
+
+    def test_recent_posts(self):
+        self.assertSameResponse('/api/v1/posts/recent/')
+
+    def test_popular_posts_fallback(self):
+        self.assertSameResponse('/api/v1/posts/popular/')
+
+    def test_popular_posts_ranked(self):
+        now = timezone.now()
+        PostRanking.objects.bulk_create([
+            PostRanking(scope=PostRanking.GLOBAL_SCOPE, rank=rank, post=post, score=1.0 / rank, computed_at=now)
+            for rank, post in enumerate([self.posts[2], self.posts[0]], start=1)
+        ])
+        self.assertSameResponse('/api/v1/posts/popular/')
+
+    def test_post_comments(self):
+        self.assertSameResponse(f'/api/v1/comments/post/{self.posts[0].id}/')
+        self.assertSameResponse(f'/api/v1/comments/post/{self.posts[1].id}/')
+
+
+class PostViewBufferApplyTest(TestCase):
+    '''Пакет просмотров применяется к БД ровно один раз'''
+
+    def test_leftover_batch_is_not_applied_twice(self):
+        author = User.objects.create_user(email='a@example.com', username='a', password='x')
+        post = Post.objects.create(title='Post', content='Body', author=author)
+        counts = {str(post.pk).encode(): b'3'}
+
+        self.assertEqual(PostViewBuffer._apply('post_views:flushing:1', counts), 3)
+        # Падение между коммитом и удалением пакета: следующий сброс видит его снова
+        self.assertIsNone(PostViewBuffer._apply('post_views:flushing:1', counts))
+
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 3)
+
+
+class SparseFieldsetsTest(TestCase):
+    '''?fields=/?omit= с неизвестными полями - ошибка, а не молча урезанный ответ'''
+
+    def field_names(self, query):
+        return PostListSerializer.sparse_field_names(Request(APIRequestFactory().get('/', query)))
+
+    def test_known_fields(self):
+        self.assertEqual(self.field_names({'fields': 'id,title', 'omit': 'title'}), {'id'})
+
+    def test_unknown_fields_are_listed(self):
+        with self.assertRaises(ValidationError) as error:
+            self.field_names({'fields': 'id,bogus,nope', 'omit': 'missing'})
+
+        self.assertEqual(error.exception.detail, {
+            'fields': ['Unknown fields: bogus, nope'],
+            'omit': ['Unknown fields: missing'],
+        })
+
+
+class DraftsOverlayFeedTest(TestCase):
+    '''Лента с черновиками продолжается по ключу, даже если страница общей ленты пересобрана'''
+
+    PAGE_SIZE = 3
+
+    def setUp(self):
+        self.now = timezone.now()
+        author = User.objects.create_user(email='a@example.com', username='a', password='x')
+        draft = Post.objects.create(title='Draft', content='Body', author=author, status='draft')
+        Post.objects.filter(pk=draft.pk).update(created_at=self.now)
+        self.drafts = Post.objects.filter(author=author, status='draft')
+        self.draft_id = draft.pk
+
+        # Общая лента: (created_at, id) по убыванию, id не пересекаются с черновиком
+        self.public = [(self.now - timedelta(minutes=minutes), 1000 + minutes) for minutes in range(1, 8)]
+        self.pages = {}
+
+    def public_page(self, anchor):
+        '''Как PostListCreateView.public_page: страницы кэшируются по позиции'''
+        cache_key = encode_position(anchor)
+        if cache_key not in self.pages:
+            items = self.public
+            if 'pin' not in anchor:
+                items = [key for key in items if key < (datetime.fromisoformat(anchor['created_at']), anchor['id'])]
+            page = items[:self.PAGE_SIZE]
+            next_position = None
+            if len(items) > self.PAGE_SIZE:
+                next_position = keyset_position(Post(created_at=page[-1][0], id=page[-1][1]))
+            self.pages[cache_key] = {'items': [(key, key[1], None) for key in page], 'next': next_position}
+        return self.pages[cache_key]
+
+    def get_page(self, cursor):
+        feed = DraftsOverlayFeed(self.public_page, self.drafts)
+        entries, next_position = feed.get_page(decode_overlay_position(cursor), self.PAGE_SIZE)
+        ids = [value[1] if source == 'public' else value.pk for source, value in entries]
+        return ids, next_position and encode_position(next_position)
+
+    def test_rebuilt_page_does_not_repeat_posts(self):
+        first, cursor = self.get_page(None)
+        self.assertEqual(first, [self.draft_id, 1001, 1002])
+
+        # Новый пост сверху: закэшированные страницы пересобираются со сдвигом
+        self.public.insert(0, (self.now + timedelta(minutes=1), 2000))
+        self.pages.clear()
+
+        seen = list(first)
+        while cursor:
+            ids, cursor = self.get_page(cursor)
+            seen.extend(ids)
+
+        self.assertEqual(seen, [self.draft_id, *range(1001, 1008)])
+
+
+@override_settings(DATABASE_REPLICAS_ENABLED=True)
+class ReplicaRoutingTest(TransactionTestCase):
+    '''
+    Куда роутер направляет чтение. В тестах реплики зеркалят default,
+    поэтому проверяется выбранный алиас - отдельная, не зеркальная реплика.
+    TransactionTestCase: в TestCase весь тест идёт внутри транзакции.
+    '''
+
+    def setUp(self):
+        patcher = mock.patch('config.routers.replica_aliases', return_value=['replica_1'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_alias(self, request, atomic=False):
+        '''Алиас, с которого view читает платёж, за ReplicaRoutingMiddleware'''
+        def view(request):
+            if atomic:
+                with transaction.atomic():
+                    return HttpResponse(router.db_for_read(Payment))
+            return HttpResponse(router.db_for_read(Payment))
+
+        return ReplicaRoutingMiddleware(view)(request).content.decode()
+
+    def test_safe_request_reads_replica(self):
+        self.assertEqual(self.read_alias(RequestFactory().get('/')), 'replica_1')
+
+    def test_transaction_reads_primary(self):
+        self.assertEqual(self.read_alias(RequestFactory().get('/'), atomic=True), 'default')
+
+    def test_pinned_client_reads_primary(self):
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.read_alias(request), 'default')
+
+    def test_outside_requests_read_primary(self):
+        self.assertEqual(router.db_for_read(Payment), 'default')
+
+
+@override_settings(
+    RESPONSE_CACHE_TTLS={},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class PostListETagTest(TestCase):
+    '''ETag списка постов меняется вместе со всем, что выводится в ответе'''
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='author@example.com', username='author', password='x')
+        cls.posts = [
+            Post.objects.create(title=f'Post {number}', content='Body', author=cls.author)
+            for number in range(21)
+        ]
+
+    def assertChanged(self, etag):
+        response = self.client.get('/api/v1/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_not_modified(self):
+        etag = self.client.get('/api/v1/posts/')['ETag']
+        self.assertEqual(self.client.get('/api/v1/posts/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_pinning_changes_etag(self):
+        etag = self.client.get('/api/v1/posts/')['ETag']
+
+        post = self.posts[-1]
+        PinnedPost.objects.bulk_create([PinnedPost(user=self.author, post=post)])
+        # То же, что сигнал post_save закрепления
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_tags(PINS_TAG)
+
+        results = self.assertChanged(etag).json()['results']
+        self.assertTrue(next(item for item in results if item['id'] == post.pk)['is_pinned'])
+
+    def test_count_change_on_other_page_changes_etag(self):
+        etag = self.client.get('/api/v1/posts/')['ETag']
+
+        # Самый старый пост - на второй странице, первая не меняется
+        self.posts[0].delete()
+
+        self.assertEqual(self.assertChanged(etag).json()['count'], 20)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PostSlugUpdateTest(TestCase):
+    '''Слаг меняется при правке заголовка, только если он перестал ему соответствовать'''
+
+    def setUp(self):
+        self.author = User.objects.create_user(email='author@example.com', username='author', password='x')
+        Post.objects.create(title='Hello', content='Body', author=self.author)
+        self.post = Post.objects.create(title='Hello', content='Body', author=self.author)
+        self.api = APIClient()
+        self.api.force_authenticate(self.author)
+
+    def rename(self, title):
+        response = self.api.patch(f'/api/v1/posts/{self.post.slug}/', {'title': title}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.post.refresh_from_db()
+        return self.post.slug
+
+    def test_case_and_punctuation_edit_keeps_slug(self):
+        self.assertEqual(self.post.slug, 'hello-2')
+        self.assertEqual(self.rename('hello!'), 'hello-2')
+
+    def test_new_title_gets_new_slug(self):
+        self.assertEqual(self.rename('Goodbye'), 'goodbye')
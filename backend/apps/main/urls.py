@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from .async_api import read_view
 
 
 urlpatterns = [
@@ -11,9 +12,15 @@ urlpatterns = [
     # Posts
     path('', views.PostListCreateView.as_view(), name='post-list'),
     path('my-posts/', views.MyPostsView.as_view(), name='my-posts'),
-    path('popular/', views.popular_posts, name='popular-posts'),
+    path('my-posts/stats/', views.my_posts_stats, name='my-posts-stats'),
+    path('popular/', read_view(views.popular_posts, views.popular_posts_async), name='popular-posts'),
     path('pinned/', views.pinned_posts_only, name='pinned-posts-only'),
     path('featured/', views.featured_posts, name='featured-posts'),
-    path('recent/', views.recent_posts, name='recent-posts'),
+    path('recent/', read_view(views.recent_posts, views.recent_posts_async), name='recent-posts'),
+    path('homepage/', views.homepage_bundle, name='homepage-bundle'),
+    path('search/', views.PostSearchView.as_view(), name='post-search'),
+    path('autocomplete/', views.autocomplete, name='post-autocomplete'),
+    path('import/', views.import_posts, name='post-import'),
+    path('export/<str:resource>/', views.export_data, name='data-export'),
     path('<slug:slug>/', views.PostDetailView.as_view(), name='post-detail')
 ]
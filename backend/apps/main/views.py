@@ -1,18 +1,56 @@
+import logging
+from datetime import timedelta
+
+import redis
 from rest_framework import generics, permissions, status, filters
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from django.shortcuts import get_object_or_404
-
-from .models import Category, Post
+from django.contrib.postgres.search import SearchHeadline, SearchRank
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.utils.decorators import method_decorator
+from django.utils import timezone
+
+from .models import Category, Post, PostDailyStats, PostRanking
 from .serializers import (
     CategorySerializer,
     PostListSerializer,
     PostDetailSerializer,
     PostCreateUpdateSerializer,
+    PostSearchSerializer,
+    ExportParamsSerializer,
+    PostStatsParamsSerializer,
 )
 from .permissions import IsAuthorOrReadOnly
+from .pagination import OptInCursorPagination, PinnedFirstCursorPagination, SearchRankCursorPagination
+from .filters import PostSearchFilter, build_search_query
+from .feed import (
+    DraftsOverlayFeed,
+    PinnedFirstFeed,
+    active_pinned_post_ids,
+    decode_overlay_position,
+    decode_position,
+    encode_position,
+    visible_pinned_ids,
+)
+from . import autocomplete as post_autocomplete
+from . import homepage
+from .async_api import async_api_view, serializer_data
+from .conditional import ConditionalListMixin, ConditionalRetrieveMixin
+from .fast_serializers import PostListFastSerializer, fast_path_enabled
+from .fieldsets import SparseFieldsetViewMixin
+from .export import EXPORT_RESOURCES, export_response
+from .importer import IMPORT_FORMATS, PostImporter, decode_lines, detect_format, read_records
+from .counters import PostDailyStatsBuffer, PostViewBuffer, viewer_id
+from .response_cache import acached_response, cached_fragment, cached_response, CACHE_HEADER, PINS_TAG, POSTS_TAG, RANKINGS_TAG
+
+logger = logging.getLogger(__name__)
 
 
 class CategoryListCreateView(generics.ListCreateAPIView):
@@ -34,124 +72,435 @@ class CategoryDetailView(generics.RetrieveUpdateAPIView):
     lookup_field = 'slug'
 
 
-class PostListCreateView(generics.ListCreateAPIView):
+class PostListCreateView(ConditionalListMixin, SparseFieldsetViewMixin, generics.ListCreateAPIView):
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend]
+    pagination_class = OptInCursorPagination
+    filter_backends = [DjangoFilterBackend, PostSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'content']
     ordering_fields = ['created_at', 'updated_at', 'views_count', 'title']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    validator_fields = ('updated_at', 'views_count', 'comments_count', 'image_variants')
+    # author и category выводятся строками; is_pinned/pinned_info - из реестра закреплений
+    related_validator_fields = ('author__email', 'category__name')
+    validator_tags = (PINS_TAG,)
+
+    # Параметры, при которых лента "закрепленные сверху" собирается из общих страниц
+    shared_feed_params = {'cursor', 'page_size', 'pagination'}
+
+    def get_base_queryset(self):
+        queryset = Post.objects.select_related('author', 'category')
+        if self.request.method == 'GET':
+            queryset = queryset.defer(*Post.LIST_DEFERRED_FIELDS)
+        return queryset
 
     def get_queryset(self):
         '''Посты с учётом прав доступа'''
 
-        queryset = Post.objects.select_related('author', 'category')
+        queryset = self.get_base_queryset()
 
         # Фильтрация по правам доступа
         if not self.request.user.is_authenticated:
-            queryset = queryset.filter(status='published')
-        else:
-            queryset = queryset.filter(
-                Q(status='published') | Q(author=self.request.user))
-        
-        # Проверка на необходимость сортировки с учетом закрепленных постов
+            return queryset.filter(status='published')
+        return queryset.filter(
+            Q(status='published') | Q(author=self.request.user))
+
+    def show_pinned_first(self):
+        '''
+        Лента "закрепленные сверху" - при сортировке по умолчанию в курсорном режиме.
+        Без ?pagination=cursor - обычная постраничная пагинация (?page=N, count).
+        '''
         ordering = self.request.query_params.get('ordering', '')
-        show_pinned_first = not ordering or ordering in ['-created_at', 'created_at']
+        return ordering in ['', '-created_at'] and self.paginator.is_cursor_mode(self.request)
+
+    def uses_shared_feed(self):
+        '''Без поиска, фильтров и ?fields= страница одинакова для всех'''
+        return self.show_pinned_first() and set(self.request.query_params) <= self.shared_feed_params
 
-        if show_pinned_first:
-            return Post.get_posts_for_feed().filter(
-                Q(status='published') | (
-                    Q(author=self.request.user) if self.request.user.is_authenticated else Q()
-                )
-            )
-        return queryset
-    
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return PostCreateUpdateSerializer
         return PostListSerializer
 
     def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        # Статка закрепленных постов
-        if hasattr(response, 'data') and 'result' in response.data:
-            pinned_count = sum(1 for post in response.data['result'] if post.get('is_pinned', False))
-            response.data['pinned_posts_count'] = pinned_count
-        
-        return response
+        if not self.show_pinned_first():
+            return super().list(request, *args, **kwargs)
+        if self.uses_shared_feed():
+            return self.shared_feed_list(request)
+
+        # Закрепленные посты сверху, далее обычные по курсору
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = PinnedFirstCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return self.conditional_page(
+            page,
+            lambda: paginator.get_paginated_response(self.get_serializer(page, many=True).data),
+        )
+
+    def public_page(self, position, page_size):
+        '''
+        Страница общей ленты опубликованных постов в кэше ответов:
+        {'items': [(ключ, данные, валидаторы)], 'next': позиция, 'pinned_count': число закрепленных}.
+        Одна и та же для анонимов и всех авторизованных юзеров.
+        '''
+        def build():
+            queryset = self.filter_queryset(self.get_base_queryset().filter(status='published'))
+            feed = PinnedFirstFeed(queryset, active_pinned_post_ids())
+            posts, next_position = feed.get_page(position, page_size)
+
+            pinned = set(feed.pinned_ids)
+            data = self.get_serializer(posts, many=True).data
+            return {
+                'items': [
+                    (None if post.pk in pinned else (post.created_at, post.pk), item, validators)
+                    for post, item, validators in zip(posts, data, self.page_validators(posts))
+                ],
+                'next': next_position,
+                'pinned_count': len(feed.pinned_ids),
+            }
+
+        page, hit = cached_fragment(
+            'post_feed',
+            [self.request.build_absolute_uri(self.request.path), page_size, sorted(position.items())],
+            [POSTS_TAG, PINS_TAG],
+            build,
+        )
+        self.shared_feed_hits.append(hit)
+        self.shared_pinned_count = page['pinned_count']
+        return page
+
+    def shared_feed_list(self, request):
+        '''
+        Лента "закрепленные сверху" из общих страниц. Авторизованному юзеру
+        поверх них вклеиваются его черновики отдельным маленьким запросом,
+        поэтому его лента кэшируется так же, как анонимная.
+        '''
+        paginator = PinnedFirstCursorPagination()
+        page_size = paginator.get_page_size(request)
+        cursor = request.query_params.get(paginator.cursor_query_param)
+        self.shared_feed_hits = []
+        self.shared_pinned_count = None
+
+        try:
+            if request.user.is_authenticated:
+                position = decode_overlay_position(cursor)
+            else:
+                position = decode_position(cursor)
+        except ValueError:
+            raise NotFound(paginator.invalid_cursor_message)
+
+        if request.user.is_authenticated:
+            drafts = self.filter_queryset(
+                self.get_base_queryset().filter(author=request.user).exclude(status='published')
+            )
+            entries, next_position = DraftsOverlayFeed(
+                lambda anchor: self.public_page(anchor, page_size), drafts
+            ).get_page(position, page_size)
+
+            draft_posts = [value for source, value in entries if source == 'draft']
+            draft_items = iter(zip(
+                self.get_serializer(draft_posts, many=True).data, self.page_validators(draft_posts)
+            ))
+            items = [
+                value[1:] if source == 'public' else next(draft_items)
+                for source, value in entries
+            ]
+        else:
+            page = self.public_page(position, page_size)
+            items = [item[1:] for item in page['items']]
+            next_position = page['next']
+
+        if self.shared_pinned_count is None:
+            # Общая лента уже кончилась и страницы не читались
+            self.shared_pinned_count = len(visible_pinned_ids(
+                self.get_base_queryset().filter(status='published'), active_pinned_post_ids()
+            ))
+
+        def build_response():
+            next_link = None
+            if next_position is not None:
+                next_link = replace_query_param(
+                    request.build_absolute_uri(), paginator.cursor_query_param, encode_position(next_position)
+                )
+            return Response({
+                'next': next_link,
+                'previous': None,
+                'results': [data for data, _ in items],
+                'pinned_posts_count': self.shared_pinned_count,
+            }, headers={CACHE_HEADER: 'HIT' if all(self.shared_feed_hits) else 'MISS'})
+
+        return self.conditional_response(
+            self.validators_etag([validators for _, validators in items]), build_response
+        )
 
 
-class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PostDetailView(ConditionalRetrieveMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     '''API endpoint для конкретного поста'''
 
-    queryset = Post.objects.select_related('author', 'category')
+    queryset = Post.objects.select_related('author', 'category').defer('viewers_sketch')
     serializer_class = PostDetailSerializer
     permission_classes = [IsAuthorOrReadOnly]
     lookup_field = 'slug'
+    validator_fields = ('updated_at', 'views_count', 'unique_viewers', 'comments_count', 'image_variants')
+    # author_info и category_info
+    related_validator_fields = (
+        'author__username', 'author__first_name', 'author__avatar', 'author__avatar_variants',
+        'category__name', 'category__slug',
+    )
+    validator_tags = (PINS_TAG,)
+    vary_headers = ('Authorization',)
 
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
             return PostCreateUpdateSerializer
         return PostDetailSerializer
+
+    def response_validators(self):
+        '''can_pin зависит от юзера, is_pinned/pinned_info/can_pin - от реестра закреплений'''
+        return [self.request.user.pk, *super().response_validators()]
     
-    def retrieve(self, request, *args, **kwargs):
+    def retrieve_modified(self, request, values, *args, **kwargs):
         '''Увеличивает счётчик просмотров при GET'''
         instance = self.get_object()
 
         if request.method == 'GET':
-            instance.increment_views()
+            instance.increment_views(viewer_id(request))
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def retrieve_not_modified(self, request, values):
+        '''Просмотр засчитывается и при 304'''
+        if request.method == 'GET':
+            PostViewBuffer.record(values['pk'], viewer_id(request))
+
 
-class MyPostsView(generics.ListAPIView):
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class MyPostsView(ConditionalListMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     '''API endpoint для постов юзера'''
 
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters]
+    pagination_class = OptInCursorPagination
+    filter_backends = [DjangoFilterBackend, PostSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'status']
     search_fields = ['title', 'content']
-    ordering_fields = ['created_at', 'updated_at', 'views_count', '']
-    ordering = ['-created_at']
+    ordering_fields = ['created_at', 'updated_at', 'views_count', 'title']
+    ordering = ['-created_at', '-id']
+    validator_fields = ('updated_at', 'views_count', 'comments_count', 'image_variants')
+    # author и category выводятся строками; is_pinned/pinned_info - из реестра закреплений
+    related_validator_fields = ('author__email', 'category__name')
+    validator_tags = (PINS_TAG,)
 
     def get_queryset(self):
         return Post.objects.filter(
             author=self.request.user,
-            ).select_related('author', 'category')
+            ).select_related('author', 'category').defer(*Post.LIST_DEFERRED_FIELDS)
+
+
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def my_posts_stats(request):
+    '''
+    Статистика постов автора за последние ?days= дней (или одного ?post=).
+    Читаются только предагрегированные дневные строки PostDailyStats.
+    unique_viewers за период - оценка объединения дневных скетчей HyperLogLog
+    (зритель, заходивший в разные дни или на разные посты, считается один раз);
+    скетчи читаются потоком и сливаются в Redis пачками. При недоступном Redis
+    или больше POST_STATS_MAX_SKETCHES скетчах - сумма дневных значений.
+    '''
+    params = PostStatsParamsSerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+
+    today = timezone.localdate()
+    since = today - timedelta(days=params.validated_data['days'] - 1)
+    stats = PostDailyStats.objects.filter(post__author=request.user, date__gte=since)
+    if 'post' in params.validated_data:
+        stats = stats.filter(post_id=params.validated_data['post'])
+
+    metrics = {
+        'views': Sum('views'),
+        'unique_viewers': Sum('unique_viewers'),
+        'comments': Sum('comments'),
+    }
+    empty = dict.fromkeys(metrics, 0)
+
+    daily = {}
+    for row in stats.order_by().values('date').annotate(**metrics):
+        daily[row.pop('date')] = row
+    posts = stats.order_by().values('post_id', 'post__title', 'post__slug').annotate(**metrics).order_by('-views')
+    with_sketch = ~Q(viewers_sketch=b'')
+    totals = stats.aggregate(**metrics, sketches=Count('pk', filter=with_sketch))
+    sketches = totals.pop('sketches')
+    totals = {name: value or 0 for name, value in totals.items()}
+
+    uniques = None
+    if sketches > settings.POST_STATS_MAX_SKETCHES:
+        logger.info(f'Unique viewers union skipped for {sketches} sketches, falling back to sums')
+    else:
+        rows = stats.filter(with_sketch).order_by('post_id').values_list(
+            'post_id', 'date', 'viewers_sketch'
+        ).iterator(chunk_size=PostDailyStatsBuffer.BATCH_SIZE)
+        try:
+            uniques = PostDailyStatsBuffer.union_counts(rows)
+        except redis.RedisError as e:
+            logger.warning(f'Unique viewers union unavailable, falling back to sums: {e}')
+
+    if uniques is not None:
+        totals['unique_viewers'] = uniques['total']
+        for day, row in daily.items():
+            row['unique_viewers'] = uniques.get(('day', day), 0)
+        for row in posts:
+            row['unique_viewers'] = uniques.get(('post', row['post_id']), 0)
+
+    return Response({
+        'from': since,
+        'to': today,
+        'totals': totals,
+        'daily': [
+            {'date': day, **daily.get(day, empty)}
+            for day in (since + timedelta(days=offset) for offset in range((today - since).days + 1))
+        ],
+        'posts': [
+            {
+                'id': row['post_id'],
+                'title': row['post__title'],
+                'slug': row['post__slug'],
+                **{name: row[name] for name in metrics},
+            }
+            for row in posts
+        ],
+    })
+
+
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class PostSearchView(SparseFieldsetViewMixin, generics.ListAPIView):
+    '''Полнотекстовый поиск по постам с ранжированием и подсветкой (?q=)'''
+
+    serializer_class = PostSearchSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = SearchRankCursorPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        terms = self.request.query_params.get('q', '').strip()
+        query = build_search_query(terms)
+
+        queryset = Post.objects.select_related('author', 'category').defer(
+            *Post.LIST_DEFERRED_FIELDS
+        ).filter(
+            status='published',
+            search_vector=query,
+        ).annotate(
+            # ts_rank возвращает real; double precision переживает
+            # круговой путь через курсор без потери точности
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+        )
+
+        # ts_headline перечитывает весь текст - только если фрагмент запрошен
+        fields = PostSearchSerializer.sparse_field_names(self.request)
+        if fields is None or 'headline' in fields:
+            queryset = queryset.annotate(headline=SearchHeadline(
+                'content', query,
+                config=Post.SEARCH_CONFIG,
+                start_sel='<mark>', stop_sel='</mark>',
+                max_words=35, min_words=15,
+            ))
+        return queryset if terms else queryset.none()
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+def autocomplete(request):
+    '''Автодополнение по заголовкам постов и названиям категорий (?q=&limit=)'''
+    try:
+        limit = min(int(request.query_params.get('limit', post_autocomplete.DEFAULT_LIMIT)), post_autocomplete.MAX_LIMIT)
+    except ValueError:
+        limit = post_autocomplete.DEFAULT_LIMIT
+
+    return Response(post_autocomplete.suggest(request.query_params.get('q', ''), max(limit, 1)))
+
+
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+@cached_response('popular_posts', [POSTS_TAG, PINS_TAG, RANKINGS_TAG])
 def popular_posts(request):
-    '''10 популярных постов'''
-    score_posts = 10
+    '''10 "горячих" постов: глобально или в категории (?category=slug)'''
+    scope = PostRanking.GLOBAL_SCOPE
+    posts = homepage.published_posts()
 
-    posts = Post.objects.with_subscription_info().filter(
-        status='published'
-    ).order_by('-views_count')[:score_posts]
+    category_slug = request.query_params.get('category')
+    if category_slug:
+        category = get_object_or_404(Category, slug=category_slug)
+        scope = PostRanking.category_scope(category.id)
+        posts = posts.filter(category=category)
+
+    if fast_path_enabled(request):
+        return Response(homepage.popular_posts(
+            posts, scope, evaluate=PostListFastSerializer(request).serialize
+        ))
 
-    serializer = PostListSerializer(posts, many=True, context={'request': request})
+    serializer = PostListSerializer(
+        homepage.popular_posts(posts, scope), many=True, context={'request': request}
+    )
     return Response(serializer.data)
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@cached_response('recent_posts', [POSTS_TAG, PINS_TAG])
 def recent_posts(request):
     '''10 популярных постов'''
-    score_posts = 10
-
-    posts = Post.objects.with_subscription_info().filter(
-        status='published'
-    ).order_by('-created_at')[:score_posts]
+    if fast_path_enabled(request):
+        return Response(PostListFastSerializer(request).serialize(homepage.recent_posts()))
 
-    serializer = PostListSerializer(posts, many=True, context={'request': request})
+    serializer = PostListSerializer(homepage.recent_posts(), many=True, context={'request': request})
     return Response(serializer.data)
 
 
+@async_api_view()
+@acached_response('popular_posts', [POSTS_TAG, PINS_TAG, RANKINGS_TAG])
+async def popular_posts_async(request):
+    '''popular_posts на async ORM (запуск под ASGI)'''
+    scope = PostRanking.GLOBAL_SCOPE
+    posts = homepage.published_posts()
+
+    category_slug = request.query_params.get('category')
+    if category_slug:
+        category = await aget_object_or_404(Category, slug=category_slug)
+        scope = PostRanking.category_scope(category.id)
+        posts = posts.filter(category=category)
+
+    if fast_path_enabled(request):
+        return Response(await homepage.apopular_posts(
+            posts, scope, evaluate=PostListFastSerializer(request).aserialize
+        ))
+
+    serializer = PostListSerializer(
+        await homepage.apopular_posts(posts, scope), many=True, context={'request': request}
+    )
+    return Response(await serializer_data(serializer))
+
+
+@async_api_view()
+@acached_response('recent_posts', [POSTS_TAG, PINS_TAG])
+async def recent_posts_async(request):
+    '''recent_posts на async ORM (запуск под ASGI)'''
+    if fast_path_enabled(request):
+        return Response(await PostListFastSerializer(request).aserialize(homepage.recent_posts()))
+
+    serializer = PostListSerializer(homepage.recent_posts(), many=True, context={'request': request})
+    return Response(await serializer_data(serializer))
+
+
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@cached_response('post_by_category', [POSTS_TAG, PINS_TAG])
 def post_by_category(request, category_slug):
     '''Посты определенной категории'''
 
@@ -159,47 +508,30 @@ def post_by_category(request, category_slug):
     posts = Post.objects.with_subscription_info().filter(
         category=category,
         status='published'
-    )
+    ).defer(*Post.LIST_DEFERRED_FIELDS)
 
-    from django.db.models import Case, When, Value, DateTimeField, BooleanField
-    from django.utils import timezone
-
-    posts = posts.annotate(
-        effective_date = Case(
-            When(
-                pin_info__isnull=False,
-                pin_info__user__subscription__status='active',
-                pin_info__user__subscription__end_date__gt=timezone.now(),
-                then='pin_info__pinned_at'
-            ),
-            default='created_at',
-            output_field=DateTimeField()
-        ),
-        is_pinned_flag=Case(
-            When(
-                pin_info__isnull=False,
-                pin_info__user__subscription__status='active',
-                pin_info__user__subscription__end_date__gt=timezone.now(),
-                then=Value(True)
-            ),
-            default=Value(False),
-            output_field=BooleanField()
-        )
-    ).order_by('-is_pinned_flag', 'effective_date', '-created_at')
-    serializer = PostListSerializer(posts, many=True, context={'request': request})
+    # Закрепленные посты категории сверху, далее обычные по курсору
+    paginator = PinnedFirstCursorPagination()
+    page = paginator.paginate_queryset(
+        posts, request, pinned_ids=active_pinned_post_ids(category=category)
+    )
+    serializer = PostListSerializer(page, many=True, context={'request': request})
 
     return Response({
         'category': CategorySerializer(category).data,
         'posts': serializer.data,
-        'pinned_posts_count': sum(1 for post in serializer.data if post.get('is_pinned', False))
+        'pinned_posts_count': paginator.pinned_count,
+        'next': paginator.get_next_link(),
     })
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@cached_response('pinned_posts_only', [POSTS_TAG, PINS_TAG])
 def pinned_posts_only(request):
     '''Только закрепленные посты'''
-    posts = Post.objects.pinned_posts()
+    posts = Post.objects.pinned_posts().defer(*Post.LIST_DEFERRED_FIELDS)
     serializer = PostListSerializer(
         posts, many=True, context={'request': request}
     )
@@ -209,28 +541,17 @@ def pinned_posts_only(request):
     })
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@cached_response('featured_posts', [POSTS_TAG, PINS_TAG, RANKINGS_TAG])
 def featured_posts(request):
     '''
     Рек. посты для главной страницы:
     - Закр посты (макс 3 штуки)
-    - Популярные посты за посл. неделю
+    - "Горячие" посты из рейтинга
     '''
-    from django.utils import timezone
-    from datetime import timedelta
-
-    # 3 посл закр посты
-    pinned_posts = Post.objects.pinned_posts()[:3]
-
-    # Получаем популярные посты за неделю (исключая уже закрепленные)
-    week_ago = timezone.now() - timedelta(days=7)
-    popular_posts = Post.objects.with_subscription_info().filter(
-        status='published',
-        created_at__gte=week_ago,
-    ).exclude(
-        id__in=[post.id for post in pinned_posts]
-    ).order_by('-views_count')[:6]
+    pinned_posts, popular_posts, total_pinned = homepage.featured_posts()
 
     # Сериализуем данные
     pinned_serializer = PostListSerializer(
@@ -245,10 +566,66 @@ def featured_posts(request):
     return Response({
         'pinned_posts': pinned_serializer.data,
         'popular_posts': popular_serializer.data,
-        'total_pinned': Post.objects.pinned_posts().count(),
+        'total_pinned': total_pinned,
     })
 
 
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def homepage_bundle(request):
+    '''
+    Все секции главной страницы одним ответом:
+    рек. посты, последние, "горячие" и категории.
+    Бандл собирается фоновой задачей и отдаётся из кэша.
+    '''
+    return Response(homepage.get_bundle())
+
+
+@transaction.non_atomic_requests
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def import_posts(request):
+    '''
+    Массовый импорт постов из загруженного JSONL/CSV файла (поле file).
+    Без общей транзакции запроса: каждая пачка фиксируется отдельно.
+    Автор по умолчанию - текущий пользователь.
+    '''
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'File is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    format = request.data.get('format') or detect_format(upload.name)
+    if format not in IMPORT_FORMATS:
+        return Response({'error': f'Unknown format: {format}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        stats = PostImporter(default_author=request.user).run(
+            read_records(decode_lines(upload), format)
+        )
+    except UnicodeDecodeError:
+        return Response({'error': 'File must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(stats, status=status.HTTP_201_CREATED if stats['created'] else status.HTTP_200_OK)
+
+
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_data(request, resource):
+    '''
+    Потоковая выгрузка постов, комментариев или категорий для аналитики.
+    ?output=ndjson|csv, ?gzip=1, ?updated_from=...&updated_to=...
+    Строки читаются серверным курсором и отдаются по мере чтения.
+    '''
+    if resource not in EXPORT_RESOURCES:
+        return Response({'error': f'Unknown resource: {resource}'}, status=status.HTTP_404_NOT_FOUND)
+
+    params = ExportParamsSerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    return export_response(resource, **params.validated_data)
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def toggle_post_pin_status(request, slug):
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0001_initial'),
+        ('subscribe', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', '-created_at'], name='payments_user_id_2c5fd7_idx'),
+        ),
+    ]
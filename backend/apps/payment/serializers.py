@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from decimal import Decimal
+from apps.main.fieldsets import SparseFieldsetMixin
 from .models import Payment, PaymentAttempt, Refund, WebhookEvent
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     '''Сериализатор для платежей'''
     user_info = serializers.SerializerMethodField()
     subscription_info = serializers.SerializerMethodField()
@@ -24,6 +25,18 @@ class PaymentSerializer(serializers.ModelSerializer):
             'id', 'user', 'status', 'created_at', 'updated_at', 'processed_at'
         ]
 
+        sparse_columns = {
+            'user_info': ['user'],
+            'subscription_info': ['subscription'],
+            'is_successful': ['status'],
+            'is_pending': ['status'],
+            'can_be_refunded': ['status', 'payment_method'],
+        }
+        sparse_relations = {
+            'user_info': ['user'],
+            'subscription_info': ['subscription__plan'],
+        }
+
     def get_user_info(self, obj):
         '''Возврат инфы о юзере'''
         return {
@@ -1,11 +1,12 @@
 from django.urls import path
 from . import views
+from apps.main.async_api import read_view
 
 
 urlpatterns = [
     path('payments/', views.PaymentListView.as_view(), name='payment-list'),
     path('payments/<int:pk>/', views.PaymentDetailView.as_view(), name='payment-detail'),
-    path('payments/<int:payment_id>/status/', views.payment_status, name='payment-status'),
+    path('payments/<int:payment_id>/status/', read_view(views.payment_status, views.payment_status_async), name='payment-status'),
     path('payments/<int:payment_id>/cancel/', views.cancel_payment, name='cancel-payment'),
     path('payments/<int:payment_id>/retry/', views.retry_payment, name='retry-payment'),
     path('payments/history/', views.user_payments_history, name='payment-history'),
@@ -1,4 +1,5 @@
 import stripe, json
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -6,8 +7,9 @@ from django.views.decorators.http import require_POST
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.decorators import method_decorator
 
 from .models import Payment, PaymentAttempt, Refund, WebhookEvent
 from .serializers import (
@@ -21,21 +23,27 @@ from .serializers import (
 )
 from .services import StripeService, PaymentService, WebhookService
 from apps.subscribe.models import SubscriptionPlan
+from apps.main.async_api import async_api_view
+from apps.main.fieldsets import SparseFieldsetViewMixin
+from apps.main.pagination import OptInCursorPagination
 
 
-class PaymentListView(generics.ListAPIView):
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class PaymentListView(SparseFieldsetViewMixin, generics.ListAPIView):
     '''Список платежей юзера'''
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptInCursorPagination
 
     def get_queryset(self):
         '''Возврат платежей текущего юзера'''
         return Payment.objects.filter(
             user=self.request.user,
-        ).select_related('subscription', 'subscription__plan').order_by('-created_at')
+        ).select_related('user', 'subscription', 'subscription__plan').order_by('-created_at')
     
 
-class PaymentDetailView(generics.RetrieveAPIView):
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class PaymentDetailView(SparseFieldsetViewMixin, generics.RetrieveAPIView):
     '''Детальная информация о платеже'''
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -94,45 +102,76 @@ def create_checkout_session(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@transaction.atomic
+def apply_session_status(payment, session_info):
+    '''Проведение платежа по статусу сессии Stripe (async-view работает без транзакции на запрос)'''
+    if session_info:
+        if session_info['status'] == 'complete':
+            PaymentService.process_successful_payment(payment)
+        elif session_info['status'] == 'failed':
+            PaymentService.process_failed_payment(payment, 'Session failed')
+
+
+def payment_status_data(payment):
+    response_data = {
+        'payment_id': payment.id,
+        'status': payment.status,
+        'message': f'Payment is {payment.status}',
+        'subscription_activated': False
+    }
+
+    if payment.is_successful and payment.subscription:
+        response_data['subscription_activated'] = payment.subscription.is_active
+        response_data['message'] = 'Payment successful and subscription activated'
+
+    return PaymentStatusSerializer(response_data).data
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def payment_status(request, payment_id):
     '''Проверка статуса платежа'''
     try:
+        # Платёж может быть проведён здесь же - читается с основной БД, не с реплики
         payment = get_object_or_404(
-            Payment,
+            Payment.objects.using(DEFAULT_DB_ALIAS),
             id=payment_id,
             user=request.user
         )
 
         # Если есть session_id, проверка статуса в Stripe
-        if payment.stripe_session_id and payment_status in ['pending', 'processing']:
+        if payment.stripe_session_id and payment.status in ['pending', 'processing']:
             session_info = StripeService.retrieve_session(payment.stripe_session_id)
+            apply_session_status(payment, session_info)
 
-            if session_info:
-                if session_info['status'] == 'complete':
-                    PaymentService.process_successful_payment(payment)
-                elif session_info['status'] == 'failed':
-                    PaymentService.process_failed_payment(payment, 'Session failed')
-        response_data = {
-            'payment_id': payment.id,
-            'status': payment.status,
-            'message': f'Payment is {payment.status}',
-            'subscription_activated': False
-        }
-
-        if payment.is_successfully and payment.subscription:
-            response_data['subscription_activated'] = payment.subscription.is_active
-            response_data['message'] = 'Payment successful and subscription activated'
-
-            serializer = PaymentStatusSerializer(response_data)
-            return Response(serializer.data)
+        return Response(payment_status_data(payment))
     except Payment.DoesNotExist:
         return Response({
             'error': 'Payment not found'
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@async_api_view([permissions.IsAuthenticated])
+async def payment_status_async(request, payment_id):
+    '''
+    payment_status на async ORM (запуск под ASGI).
+    Запрос к Stripe - в общем пуле потоков, не занимая поток БД запроса;
+    проведение платежа (транзакции) - в потоке синхронного кода.
+    '''
+    # Платёж может быть проведён здесь же - читается с основной БД, не с реплики
+    payment = await aget_object_or_404(
+        Payment.objects.using(DEFAULT_DB_ALIAS).select_related('subscription'), id=payment_id, user=request.user
+    )
+
+    if payment.stripe_session_id and payment.status in ['pending', 'processing']:
+        session_info = await sync_to_async(StripeService.retrieve_session, thread_sensitive=False)(
+            payment.stripe_session_id
+        )
+        await sync_to_async(apply_session_status)(payment, session_info)
+
+    return Response(payment_status_data(payment))
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def cancel_payment(request, payment_id):
@@ -164,6 +203,7 @@ def cancel_payment(request, payment_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class RefundListView(generics.ListAPIView):
     '''Список возврата для администраторов'''
     serializer_class = RefundSeriaizer
@@ -175,6 +215,7 @@ class RefundListView(generics.ListAPIView):
         ).order_by('-created_by')
 
 
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class RefundDetailView(generics.RetrieveAPIView):
     '''Детальная информация о возврате'''
     serializer_class = RefundSeriaizer
@@ -267,6 +308,7 @@ def stripe_webhook(request):
         return HttpResponse(status=400)
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.IsAdminUser])
 def payment_analytics(request):
@@ -320,6 +362,7 @@ def payment_analytics(request):
     )
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_payments_history(request):
@@ -1,7 +1,8 @@
 from django.db import models
 from django.conf import settings
 
-from datetime import timezone, timedelta
+from django.utils import timezone
+from datetime import timedelta
 
 
 # Create your models here.
@@ -47,7 +47,7 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         return {
             'id': obj.user.id,
             'name': obj.user.username,
-            'fullname': obj.user.fullname,
+            'fullname': obj.user.full_name,
             'email': obj.user.email,
         }
 
@@ -102,7 +102,7 @@ class PinnedPostSerializer(serializers.ModelSerializer):
             'title': obj.post.title,
             'slug': obj.post.slug,
             'content': obj.post.content,
-            'image': obj.post.image,
+            'image': obj.post.image.url if obj.post.image else None,
             'views_count': obj.post.views_count,
             'created_at': obj.post.created_at,
         }
@@ -158,13 +158,19 @@ class UserSubscriptionStatusSerializer(serializers.Serializer):
     def to_representation(self, instance):
         '''Формирует ответ с информацией о подписке'''
         user = instance
-        has_subscription = hasattr(user, 'subscription')
-        subscription = user.subscription if has_subscription else None
+        subscription = getattr(user, 'subscription', None)
+        is_active = subscription.is_active if subscription else False
+        # pinned_post - обратная сторона ForeignKey, т.е. менеджер
+        pinned_post = user.pinned_post.select_related('post').first() if is_active else None
+        return self.represent(subscription, pinned_post)
+
+    @staticmethod
+    def represent(subscription, pinned_post):
+        '''Ответ по уже загруженным подписке и закреплению (async-вариант view загружает их сам)'''
         is_active = subscription.is_active if subscription else False
-        pinned_post = getattr(user, 'pinned_post', None) if is_active else None
 
         return {
-            'has_subscription': has_subscription,
+            'has_subscription': subscription is not None,
             'is_active': is_active,
             'subscription': SubscriptionSerializer(subscription).data if subscription else None,
             'pinned_post': PinnedPostSerializer(pinned_post).data if pinned_post else None,
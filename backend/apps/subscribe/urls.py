@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from apps.main.async_api import read_view
 
 
 urlpatterns = [
@@ -9,7 +10,7 @@ urlpatterns = [
 
     # User subscription
     path('my-subscription/', views.UserSubscriptionView.as_view(), name='my-subscription'),
-    path('status/', views.subscription_status, name='subscription-status'),
+    path('status/', read_view(views.subscription_status, views.subscription_status_async), name='subscription-status'),
     path('history/', views.SubscriptionHistoryView.as_view(), name='subscription-history'),
     path('cancel/', views.cancel_subscription, name='cancel-subscription'),
 
@@ -3,7 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from django.utils import timezone
+from django.utils.decorators import method_decorator
 
 from .models import Subscription, SubscriptionPlan, PinnedPost, SubscriptionHistory
 from .serializers import (
@@ -17,9 +17,12 @@ from .serializers import (
     PinPostSerializer,
     UnpinPostSerializer,
 )
+from apps.main.async_api import async_api_view
 from apps.main.models import Post
+from apps.main.pins import get_registry
 
 
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class SubscriptionPlanListView(generics.ListAPIView):
     '''Список доступных тарифных планов'''
     queryset = SubscriptionPlan.objects.filter(is_active=True)
@@ -27,6 +30,7 @@ class SubscriptionPlanListView(generics.ListAPIView):
     permission_classes = [permissions.AllowAny]
 
 
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class SubscriptionPlanDetailView(generics.RetrieveAPIView):
     '''Детальная информация о тарифном плане'''
     queryset = SubscriptionPlan.objects.filter(is_active=True)
@@ -34,6 +38,7 @@ class SubscriptionPlanDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.AllowAny]
 
 
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class UserSubscriptionView(generics.RetrieveAPIView):
     '''Информация о подписке текущего пользователя'''
     serializer_class = SubscriptionSerializer
@@ -58,6 +63,7 @@ class UserSubscriptionView(generics.RetrieveAPIView):
             }, status=status.HTTP_404_NOT_FOUND)
     
 
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class SubscriptionHistoryView(generics.ListAPIView):
     '''История изменений подписки пользователя'''
     serializer_class = SubsctiptionHistorySerializer
@@ -118,6 +124,7 @@ class PinnedPostView(generics.RetrieveUpdateDestroyAPIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def subscription_status(request):
@@ -126,6 +133,20 @@ def subscription_status(request):
     return Response(serializer.data)
 
 
+@async_api_view([permissions.IsAuthenticated])
+async def subscription_status_async(request):
+    '''subscription_status на async ORM (запуск под ASGI)'''
+    subscription = await Subscription.objects.select_related('plan', 'user').filter(
+        user=request.user
+    ).afirst()
+
+    pinned_post = None
+    if subscription is not None and subscription.is_active:
+        pinned_post = await PinnedPost.objects.select_related('post').filter(user=request.user).afirst()
+
+    return Response(UserSubscriptionStatusSerializer.represent(subscription, pinned_post))
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def pin_post(request):
@@ -229,29 +250,30 @@ def cancel_subscription(request):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def pinned_posts_list(request):
     '''Возврат списка всех закрепленных постов для отображения в топе'''
-    # Получаем только закрепленные посты юзеров с активной подпиской
-    pinned_posts= PinnedPost.objects.select_related(
-        'post', 'post__author', 'post__category', 'user_subscription'
-    ).filter(
-        user__subscription__status='active',
-        user_subscription__end_date__gt=timezone.now(),
-        post__status='published'
-    ).order_by('pinned_at')
+    # Закрепленные посты юзеров с активной подпиской - из реестра закреплений
+    registry = get_registry()
+    pinned_ids = registry.active_post_ids()
+    posts = Post.objects.select_related('author', 'category').defer(
+        *Post.LIST_DEFERRED_FIELDS
+    ).in_bulk(pinned_ids)
 
     # Ответ с инфой о посте
     posts_data = []
 
-    for pinned_post in pinned_post:
-        post = pinned_post.post
+    for post_id in pinned_ids:
+        post = posts.get(post_id)
+        if post is None:
+            continue
         posts_data.append({
             'id': post.id,
             'title': post.title,
             'slug': post.slug,
-            'content': post.content[:200] + '...' if len(post.content) > 200 else post.content,
+            'content': post.excerpt,
             'image': post.image.url if post.image else None,
             'category': post.category.name if post.category else None,
             'author': {
@@ -262,16 +284,17 @@ def pinned_posts_list(request):
             'views_count': post.views_count,
             'comments_count': post.comments_count,
             'created_at': post.created_at,
-            'pinned_at': post.pinned_at,
+            'pinned_at': registry.get(post_id).pinned_at,
             'is_pinned': True,
 
         })
     return Response({
-        'count': int(posts_data),
+        'count': len(posts_data),
         'results': posts_data
     })
 
 
+@transaction.non_atomic_requests
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def can_pin_post(request, post_id):
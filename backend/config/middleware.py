@@ -0,0 +1,120 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .routers import read_from_replicas, reset_read_routing
+
+
+PIN_COOKIE = 'db_primary'
+
+
+def _pin_key(user_id):
+    return f'db:primary-pin:{user_id}'
+
+
+def _token_user_id(request):
+    '''id юзера из JWT без обращения к БД (сам юзер загружается позже, в DRF)'''
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(jwt_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    '''
+    Безопасные запросы (GET/HEAD/OPTIONS) читают с реплик.
+    После успешной записи клиент на DB_REPLICA_PIN_SECONDS сек. закрепляется
+    за основной БД, чтобы видеть свои изменения несмотря на отставание
+    реплик: cookie (браузер) и ключ в кэше по id юзера (API-клиенты с JWT).
+    Работает и под ASGI без перехода в поток: флаг чтения - ContextVar,
+    его видят и async-запросы ORM.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not settings.DATABASE_REPLICAS_ENABLED:
+            return self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                self.pin_to_primary(request, response)
+            return response
+
+        token = read_from_replicas(not self.pinned_to_primary(request))
+        try:
+            return self.get_response(request)
+        finally:
+            reset_read_routing(token)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS_ENABLED:
+            return await self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = await self.get_response(request)
+            if response.status_code < 400:
+                await self.apin_to_primary(request, response)
+            return response
+
+        token = read_from_replicas(not await self.apinned_to_primary(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_read_routing(token)
+
+    def pinned_to_primary(self, request):
+        if PIN_COOKIE in request.COOKIES:
+            return True
+        user_id = _token_user_id(request)
+        return user_id is not None and cache.get(_pin_key(user_id)) is not None
+
+    async def apinned_to_primary(self, request):
+        if PIN_COOKIE in request.COOKIES:
+            return True
+        user_id = _token_user_id(request)
+        return user_id is not None and await cache.aget(_pin_key(user_id)) is not None
+
+    def pin_to_primary(self, request, response):
+        user = self.pin_cookie(request, response)
+        if user is not None:
+            cache.set(_pin_key(user.pk), 1, settings.DB_REPLICA_PIN_SECONDS)
+
+    async def apin_to_primary(self, request, response):
+        user = self.pin_cookie(request, response)
+        if user is not None:
+            await cache.aset(_pin_key(user.pk), 1, settings.DB_REPLICA_PIN_SECONDS)
+
+    def pin_cookie(self, request, response):
+        '''Ставит cookie закрепления; возврат юзера для ключа в кэше (или None)'''
+        seconds = settings.DB_REPLICA_PIN_SECONDS
+        if not seconds:
+            return None
+
+        response.set_cookie(PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+        # DRF подставляет сюда юзера из JWT после аутентификации во view
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user
+        return None
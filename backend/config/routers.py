@@ -0,0 +1,52 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+PRIMARY_DB = 'default'
+
+# Читать ли текущему запросу с реплик; выставляет ReplicaRoutingMiddleware.
+# Вне запросов (Celery, команды, миграции) - всё с основной БД.
+_read_from_replicas = ContextVar('read_from_replicas', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY_DB]
+
+
+def read_from_replicas(enabled):
+    '''Включает/выключает чтение с реплик; возврат токена для reset_read_routing()'''
+    return _read_from_replicas.set(enabled)
+
+
+def reset_read_routing(token):
+    _read_from_replicas.reset(token)
+
+
+class PrimaryReplicaRouter:
+    '''
+    Чтение безопасных запросов - со случайной реплики, запись и всё
+    остальное - в основную БД. Внутри транзакции основной БД (в т.ч. транзакции
+    на запрос у view, которые могут писать и на GET) чтение тоже с основной:
+    прочитанное там же и сохраняется, устаревшая строка реплики затёрла бы
+    свежие данные. Реплики - все алиасы DATABASES, кроме default;
+    без них роутер ничего не меняет.
+    '''
+
+    def db_for_read(self, model, **hints):
+        if not _read_from_replicas.get() or connections[PRIMARY_DB].in_atomic_block:
+            return PRIMARY_DB
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DB
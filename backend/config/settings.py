@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -17,6 +18,8 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
+    'django.contrib.sitemaps',
 ]
 
 THIRD_PARTY_APPS = [
@@ -43,6 +46,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,6 +85,57 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: "хост[:порт][/имя БД]" через запятую, пусто - без реплик.
+# Локально можно указать вторую БД на том же сервере (localhost/newssite),
+# в тестах реплики зеркалят default.
+for _index, _replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    _address, _, _name = _replica.partition('/')
+    _host, _, _port = _address.partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host or DATABASES['default']['HOST'],
+        'PORT': int(_port) if _port else DATABASES['default']['PORT'],
+        'NAME': _name or DATABASES['default']['NAME'],
+        # На репликах только чтение - транзакция на запрос не нужна
+        'ATOMIC_REQUESTS': False,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['config.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS_ENABLED = len(DATABASES) > 1
+
+# Сколько секунд после своей записи клиент читает с основной БД (отставание реплик)
+DB_REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', default=5, cast=int)
+
+# Профиль подключений к PostgreSQL (для основной БД и реплик):
+#   direct     - новое соединение на каждый запрос (разработка)
+#   persistent - постоянные соединения на DB_CONN_MAX_AGE сек. с проверкой перед запросом
+#   pool       - пул соединений psycopg 3 в каждом процессе (DB_POOL_*)
+#   pgbouncer  - через PgBouncer в режиме transaction: без серверных курсоров
+#                и подготовленных выражений, которые не переживают смену соединения
+DB_CONNECTION_PROFILE = config('DB_CONNECTION_PROFILE', default='direct')
+if DB_CONNECTION_PROFILE not in ('direct', 'persistent', 'pool', 'pgbouncer'):
+    raise ImproperlyConfigured(f'Unknown DB_CONNECTION_PROFILE: {DB_CONNECTION_PROFILE}')
+
+for _database in DATABASES.values():
+    if DB_CONNECTION_PROFILE in ('persistent', 'pgbouncer'):
+        _database['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=60, cast=int)
+        _database['CONN_HEALTH_CHECKS'] = True
+    if DB_CONNECTION_PROFILE == 'pool':
+        # CONN_HEALTH_CHECKS - проверка соединения при выдаче из пула
+        _database['CONN_HEALTH_CHECKS'] = True
+        _database['OPTIONS'] = {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+                'max_idle': config('DB_POOL_MAX_IDLE', default=600, cast=int),
+            },
+        }
+    if DB_CONNECTION_PROFILE == 'pgbouncer':
+        _database['DISABLE_SERVER_SIDE_CURSORS'] = True
+        _database['OPTIONS'] = {'prepare_threshold': None}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -149,6 +204,11 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:5173",
 ]
 
+# Conditional GET из SPA: валидаторы в запросе и ETag в ответе
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'if-modified-since')
+CORS_EXPOSE_HEADERS = ['ETag']
+
 
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -236,6 +296,87 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@newssite.com')
 
+# Redis (кэш и буферы счётчиков)
+REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/1')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+}
+
+# Буфер просмотров постов: как часто сбрасывать накопленные просмотры в БД (сек.)
+POST_VIEWS_FLUSH_INTERVAL = config('POST_VIEWS_FLUSH_INTERVAL', default=30.0, cast=float)
+
+# Период переноса дневной статистики постов из Redis в БД (сек.)
+POST_DAILY_STATS_FLUSH_INTERVAL = config('POST_DAILY_STATS_FLUSH_INTERVAL', default=300.0, cast=float)
+
+# Статистика автора: сколько дневных скетчей уникальных зрителей объединять за запрос
+# (больше - unique_viewers считаются суммой дневных значений)
+POST_STATS_MAX_SKETCHES = config('POST_STATS_MAX_SKETCHES', default=20000, cast=int)
+
+# Рейтинг "горячих" постов: окно активности (ч.), размер топа, период пересчёта (сек.)
+# Почасовые корзины просмотров в Redis живут на час дольше окна
+HOT_RANKING_WINDOW_HOURS = config('HOT_RANKING_WINDOW_HOURS', default=24, cast=int)
+if HOT_RANKING_WINDOW_HOURS < 1:
+    raise ImproperlyConfigured(f'HOT_RANKING_WINDOW_HOURS must be positive: {HOT_RANKING_WINDOW_HOURS}')
+HOT_RANKING_TOP_K = config('HOT_RANKING_TOP_K', default=50, cast=int)
+HOT_RANKING_INTERVAL = config('HOT_RANKING_INTERVAL', default=300.0, cast=float)
+
+# Время жизни кэша автодополнения для одного префикса (сек.)
+AUTOCOMPLETE_CACHE_TTL = config('AUTOCOMPLETE_CACHE_TTL', default=300, cast=int)
+
+# Кэш ответов публичных эндпоинтов для анонимов: время жизни по эндпоинтам (сек., 0 - не кэшировать)
+RESPONSE_CACHE_TTLS = {
+    'recent_posts': config('RESPONSE_CACHE_TTL_RECENT', default=30, cast=int),
+    'popular_posts': config('RESPONSE_CACHE_TTL_POPULAR', default=300, cast=int),
+    'featured_posts': config('RESPONSE_CACHE_TTL_FEATURED', default=120, cast=int),
+    'pinned_posts_only': config('RESPONSE_CACHE_TTL_PINNED', default=60, cast=int),
+    'post_by_category': config('RESPONSE_CACHE_TTL_CATEGORY', default=60, cast=int),
+    'feeds': config('RESPONSE_CACHE_TTL_FEEDS', default=300, cast=int),
+    # Страницы ленты /posts/: общие для анонимов и авторизованных (их черновики вклеиваются поверх)
+    'post_feed': config('RESPONSE_CACHE_TTL_FEED', default=30, cast=int),
+}
+
+# Бандл главной страницы: время жизни в кэше, период пересборки и задержка пересборки после изменений (сек.)
+HOMEPAGE_BUNDLE_TTL = config('HOMEPAGE_BUNDLE_TTL', default=600, cast=int)
+HOMEPAGE_BUNDLE_INTERVAL = config('HOMEPAGE_BUNDLE_INTERVAL', default=60.0, cast=float)
+HOMEPAGE_BUNDLE_REBUILD_DELAY = config('HOMEPAGE_BUNDLE_REBUILD_DELAY', default=5, cast=int)
+
+# Ширины уменьшенных копий изображений (px)
+IMAGE_VARIANT_WIDTHS = {
+    'post': (320, 640, 1280),
+    'avatar': (48, 96, 192),
+}
+
+# Быстрая сериализация горячих списков из values() вместо ModelSerializer
+FAST_SERIALIZERS_ENABLED = config('FAST_SERIALIZERS_ENABLED', default=True, cast=bool)
+
+# Массовый импорт постов: строк на один bulk_create
+POST_IMPORT_BATCH_SIZE = config('POST_IMPORT_BATCH_SIZE', default=1000, cast=int)
+
+# Потоковая выгрузка: строк на одно чтение серверного курсора
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Публичные адреса сайта для карты сайта и RSS/Atom
+SITE_URL = config('SITE_URL', default=FRONTEND_URL)
+PUBLIC_POST_URL = config('PUBLIC_POST_URL', default=SITE_URL + '/posts/{slug}')
+PUBLIC_CATEGORY_URL = config('PUBLIC_CATEGORY_URL', default=SITE_URL + '/categories/{slug}')
+
+# Карта сайта: постов (диапазон id) на файл, задержка пересборки после изменений и период полной проверки (сек.)
+SITEMAP_CHUNK_SIZE = config('SITEMAP_CHUNK_SIZE', default=10000, cast=int)
+SITEMAP_UPDATE_DELAY = config('SITEMAP_UPDATE_DELAY', default=60, cast=int)
+SITEMAP_UPDATE_INTERVAL = config('SITEMAP_UPDATE_INTERVAL', default=3600.0, cast=float)
+
+# Реестр закреплений: время жизни версии в кэше (сек.)
+PINS_REGISTRY_TTL = config('PINS_REGISTRY_TTL', default=3600, cast=int)
+
+# Async-варианты горячих read-эндпоинтов (recent, popular, комментарии поста, статусы подписки и платежа).
+# Включать при запуске под ASGI (uvicorn config.asgi:application): под WSGI каждый такой запрос
+# запускал бы свой цикл событий. Соединения с БД под ASGI - профиль pool (DB_CONNECTION_PROFILE).
+ASYNC_READ_VIEWS_ENABLED = config('ASYNC_READ_VIEWS_ENABLED', default=False, cast=bool)
+
 # Celery настройки (опционально)
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
@@ -265,4 +406,24 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.payment.tasks.retry_failed_webhook_events',
         'schedule': 3600.0,  # Каждый час
     },
+    'flush-post-views': {
+        'task': 'apps.main.tasks.flush_post_views',
+        'schedule': POST_VIEWS_FLUSH_INTERVAL,
+    },
+    'flush-post-daily-stats': {
+        'task': 'apps.main.tasks.flush_post_daily_stats',
+        'schedule': POST_DAILY_STATS_FLUSH_INTERVAL,
+    },
+    'compute-hot-rankings': {
+        'task': 'apps.main.tasks.compute_hot_rankings',
+        'schedule': HOT_RANKING_INTERVAL,
+    },
+    'rebuild-homepage-bundle': {
+        'task': 'apps.main.tasks.rebuild_homepage_bundle',
+        'schedule': HOMEPAGE_BUNDLE_INTERVAL,
+    },
+    'update-sitemaps': {
+        'task': 'apps.main.tasks.update_sitemaps',
+        'schedule': SITEMAP_UPDATE_INTERVAL,
+    },
 }
\ No newline at end of file
@@ -11,6 +11,7 @@ urlpatterns = [
     path('api/v1/comments/', include('apps.comments.urls')),
     path('api/v1/subscribe/', include('apps.subscribe.urls')),
     path('api/v1/payment/', include('apps.payment.urls')),
+    path('', include('apps.main.syndication_urls')),
 ]
 
 # if settings.DEBUG: